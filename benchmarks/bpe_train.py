@@ -0,0 +1,48 @@
+import argparse
+import time
+
+from common import read_verdict
+
+from tokenization_strategy import BPETokenizationStrategy
+
+
+def time_training(text: str, vocab_size: int, engine: str) -> float:
+    strategy = BPETokenizationStrategy()
+    start = time.perf_counter()
+    strategy.train(text, vocab_size=vocab_size, engine=engine)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the naive and incremental BPE trainers."
+    )
+    parser.add_argument("--corpus", default=None)
+    parser.add_argument(
+        "--vocab-sizes", type=int, nargs="+", default=[300, 400, 600, 1000]
+    )
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.corpus:
+        with open(args.corpus, "r", encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = read_verdict()
+
+    print(f"{'vocab_size':>10} {'naive (s)':>10} {'incremental (s)':>16} {'speedup':>8}")
+    for vocab_size in args.vocab_sizes:
+        naive = min(
+            time_training(text, vocab_size, "naive") for _ in range(args.repeat)
+        )
+        incremental = min(
+            time_training(text, vocab_size, "incremental") for _ in range(args.repeat)
+        )
+        print(
+            f"{vocab_size:>10} {naive:>10.3f} {incremental:>16.3f} "
+            f"{naive / incremental:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import random
+import sys
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+VERDICT_PATH = ROOT / "assets" / "the-verdict.txt"
+
+
+def read_verdict() -> str:
+    with open(VERDICT_PATH, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def synthetic_corpus(num_bytes: int, seed: int = 0) -> str:
+    # Words are drawn from the-verdict.txt with their observed frequencies,
+    # so the synthetic text keeps a natural (Zipfian) word distribution.
+    counts = Counter(read_verdict().split())
+    words = list(counts)
+    weights = [counts[word] for word in words]
+    rng = random.Random(seed)
+
+    pieces = []
+    size = 0
+    while size < num_bytes:
+        batch = rng.choices(words, weights=weights, k=1024)
+        line = " ".join(batch) + "\n"
+        pieces.append(line)
+        size += len(line)
+    return "".join(pieces)[:num_bytes]
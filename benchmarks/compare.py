@@ -0,0 +1,67 @@
+import argparse
+import json
+import sys
+
+# Metrics where a larger value is better; every other "*seconds" metric is
+# treated as lower-is-better.
+HIGHER_IS_BETTER = ("_per_s",)
+IDENTITY_KEYS = ("vocab_size", "engine", "strategy", "dataset", "num_workers")
+
+
+def _entries(report):
+    for section, rows in report["results"].items():
+        if not isinstance(rows, list):
+            continue
+        for row in rows:
+            key = (section,) + tuple(
+                (name, row[name]) for name in IDENTITY_KEYS if name in row
+            )
+            yield key, row
+
+
+def _metric_names(row):
+    return [
+        name
+        for name, value in row.items()
+        if isinstance(value, float)
+        and (name.endswith("seconds") or name.endswith(HIGHER_IS_BETTER))
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare two benchmark suite reports and flag regressions."
+    )
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = dict(_entries(json.load(f)))
+    with open(args.candidate, "r", encoding="utf-8") as f:
+        candidate = dict(_entries(json.load(f)))
+
+    regressions = 0
+    for key, row in candidate.items():
+        if key not in baseline:
+            continue
+        for metric in _metric_names(row):
+            old, new = baseline[key].get(metric), row[metric]
+            if not old:
+                continue
+            change = (new - old) / old
+            if metric.endswith(HIGHER_IS_BETTER):
+                change = -change
+            label = " ".join(
+                [key[0]] + [f"{name}={value}" for name, value in key[1:]]
+            )
+            status = "REGRESSION" if change > args.threshold else "ok"
+            regressions += status == "REGRESSION"
+            print(f"{status:>10} {label} {metric}: {old:.4g} -> {new:.4g} ({change:+.1%})")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import time
+
+import common  # noqa: F401  (puts src/ on sys.path)
+import torch
+
+from create_embedding import CreateEmbedding
+
+
+def tensor_bytes(tensor: torch.Tensor) -> int:
+    if tensor.is_sparse:
+        tensor = tensor.coalesce()
+        return tensor_bytes(tensor.values()) + tensor_bytes(tensor.indices())
+    return tensor.numel() * tensor.element_size()
+
+
+class SeparatePositionBaseline:
+    # What the pipeline needs today: the existing CreateEmbedding plus a
+    # second positional module and an out-of-place add.
+    def __init__(self, vocab_size, output_dim, context_length):
+        self._tokens = CreateEmbedding(vocab_size, output_dim, seed=123)
+        self._positions = torch.nn.Embedding(context_length, output_dim)
+
+    def embbed(self, input_tensor):
+        positions = torch.arange(input_tensor.shape[-1])
+        return self._tokens.embbed(input_tensor) + self._positions(positions)
+
+    def parameters(self):
+        return [self._tokens.get_weight(), self._positions.weight]
+
+    def create_optimizers(self, lr=1e-3):
+        return [torch.optim.AdamW(self.parameters(), lr=lr)]
+
+
+def run(name, embedding, args):
+    optimizers = embedding.create_optimizers()
+    inputs = torch.randint(0, args.vocab_size, (args.batch_size, args.context_length))
+
+    timings = []
+    for step in range(args.warmup + args.steps):
+        start = time.perf_counter()
+        for optimizer in optimizers:
+            optimizer.zero_grad(set_to_none=True)
+        output = embedding.embbed(inputs)
+        output.float().square().mean().backward()
+        for optimizer in optimizers:
+            optimizer.step()
+        if step >= args.warmup:
+            timings.append(time.perf_counter() - start)
+
+    parameters = list(embedding.parameters())
+    parameter_bytes = sum(tensor_bytes(p) for p in parameters)
+    gradient_bytes = sum(tensor_bytes(p.grad) for p in parameters if p.grad is not None)
+    state_bytes = sum(
+        tensor_bytes(value)
+        for optimizer in optimizers
+        for state in optimizer.state.values()
+        for value in state.values()
+        if isinstance(value, torch.Tensor)
+    )
+    print(
+        f"{name:<22} {1000 * sum(timings) / len(timings):>9.2f} "
+        f"{parameter_bytes / 2**20:>10.1f} {gradient_bytes / 2**20:>10.1f} "
+        f"{state_bytes / 2**20:>10.1f} {tensor_bytes(output) / 2**20:>10.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare CreateEmbedding variants on CPU (step time and memory)."
+    )
+    parser.add_argument("--vocab-size", type=int, default=50257)
+    parser.add_argument("--output-dim", type=int, default=768)
+    parser.add_argument("--context-length", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=2)
+    args = parser.parse_args()
+
+    dims = (args.vocab_size, args.output_dim)
+    variants = {
+        "baseline (separate)": lambda: SeparatePositionBaseline(
+            *dims, args.context_length
+        ),
+        "fused fp32": lambda: CreateEmbedding(
+            *dims, seed=123, context_length=args.context_length
+        ),
+        "fused bf16": lambda: CreateEmbedding(
+            *dims, seed=123, context_length=args.context_length, dtype=torch.bfloat16
+        ),
+        "fused sparse": lambda: CreateEmbedding(
+            *dims, seed=123, context_length=args.context_length, sparse=True
+        ),
+        "fused sparse bf16": lambda: CreateEmbedding(
+            *dims,
+            seed=123,
+            context_length=args.context_length,
+            sparse=True,
+            dtype=torch.bfloat16,
+        ),
+    }
+
+    print(
+        f"{'variant':<22} {'step (ms)':>9} {'params MB':>10} {'grads MB':>10} "
+        f"{'optim MB':>10} {'output MB':>10}"
+    )
+    for name, build in variants.items():
+        run(name, build(), args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+from common import ROOT, read_verdict, synthetic_corpus
+
+from tokenization_strategy import (
+    BPETokenizationStrategy,
+    RegexTokenizationStrategy,
+    WhitespaceTokenizationStrategy,
+)
+from tokenizer import Tokenizer
+
+
+def best_of(repeat: int, fn: Callable[[], object]) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def build_vocab(text: str) -> Dict[str, int]:
+    tokens = set(text.split())
+    tokens.update(
+        item.strip()
+        for item in re.split(r'([,.:;?_!"()\']|--|\s)', text)
+        if item.strip()
+    )
+    vocab = {token: i for i, token in enumerate(sorted(tokens))}
+    vocab["<|unk|>"] = len(vocab)
+    return vocab
+
+
+def bench_train(text: str, vocab_sizes: List[int], engines: List[str], repeat: int):
+    results = []
+    for vocab_size in vocab_sizes:
+        for engine in engines:
+            seconds = best_of(
+                repeat,
+                lambda: BPETokenizationStrategy().train(
+                    text, vocab_size=vocab_size, engine=engine
+                ),
+            )
+            results.append(
+                {"vocab_size": vocab_size, "engine": engine, "seconds": seconds}
+            )
+    return results
+
+
+def bench_encode_decode(text: str, bpe_vocab_size: int, repeat: int):
+    vocab = build_vocab(text)
+    bpe = BPETokenizationStrategy()
+    bpe.train(text, vocab_size=bpe_vocab_size)
+    strategies = {
+        "whitespace": WhitespaceTokenizationStrategy(vocab),
+        "regex": RegexTokenizationStrategy(vocab),
+        "bpe": bpe,
+    }
+
+    results = []
+    num_bytes = len(text.encode("utf-8"))
+    for name, strategy in strategies.items():
+        ids = strategy.encode(text)
+        encode_seconds = best_of(repeat, lambda: strategy.encode(text))
+        decode_seconds = best_of(repeat, lambda: strategy.decode(ids))
+        results.append(
+            {
+                "strategy": name,
+                "tokens": len(ids),
+                "encode_seconds": encode_seconds,
+                "encode_tokens_per_s": len(ids) / encode_seconds,
+                "encode_mb_per_s": num_bytes / encode_seconds / 2**20,
+                "decode_seconds": decode_seconds,
+                "decode_tokens_per_s": len(ids) / decode_seconds,
+            }
+        )
+    return results
+
+
+def _rss_bytes() -> int:
+    import psutil
+
+    return psutil.Process().memory_info().rss
+
+
+def bench_create_chunks(text: str, bpe_vocab_size: int, max_length: int, stride: int):
+    from gpt_dataset import FlatGPTDataset, GPTDataset
+
+    strategy = BPETokenizationStrategy()
+    strategy.train(text, vocab_size=bpe_vocab_size)
+    tokenizer = Tokenizer(strategy=strategy)
+
+    results = []
+    for dataset_class in (GPTDataset, FlatGPTDataset):
+        gc.collect()
+        rss_before = _rss_bytes()
+        tracemalloc.start()
+        start = time.perf_counter()
+        dataset = dataset_class(tokenizer=tokenizer)
+        dataset.create_chunks(text, max_length=max_length, stride=stride)
+        seconds = time.perf_counter() - start
+        _, python_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results.append(
+            {
+                "dataset": dataset_class.__name__,
+                "max_length": max_length,
+                "stride": stride,
+                "windows": len(dataset),
+                "seconds": seconds,
+                "python_peak_bytes": python_peak,
+                "rss_delta_bytes": _rss_bytes() - rss_before,
+            }
+        )
+        del dataset
+    return results
+
+
+def bench_dataloader(
+    text: str,
+    bpe_vocab_size: int,
+    max_length: int,
+    batch_size: int,
+    worker_counts: List[int],
+    max_batches: int,
+):
+    from create_dataloader import CreateDataLoader
+    from gpt_dataset import GPTDataset
+
+    strategy = BPETokenizationStrategy()
+    strategy.train(text, vocab_size=bpe_vocab_size)
+    dataset = GPTDataset(tokenizer=Tokenizer(strategy=strategy))
+    dataset.create_chunks(text, max_length=max_length, stride=max_length)
+
+    results = []
+    for num_workers in worker_counts:
+        loader = CreateDataLoader(dataset=dataset).execute(
+            batch_size=batch_size, shuffle=True, num_workers=num_workers
+        )
+        start = time.perf_counter()
+        batches = 0
+        for batches, _ in enumerate(loader, 1):
+            if batches >= max_batches:
+                break
+        seconds = time.perf_counter() - start
+        results.append(
+            {
+                "num_workers": num_workers,
+                "batch_size": batch_size,
+                "batches": batches,
+                "seconds": seconds,
+                "batches_per_s": batches / seconds if seconds else 0.0,
+            }
+        )
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _run_optional(fn: Callable, *args):
+    # The dataset and loader sections need torch; the tokenizer ones do not.
+    try:
+        return fn(*args)
+    except ImportError as e:
+        return {"skipped": str(e)}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the tokenizer/dataset benchmark suite and write JSON."
+    )
+    parser.add_argument("--output", default="bench_output.json")
+    parser.add_argument(
+        "--corpus",
+        choices=["verdict", "synthetic"],
+        default="verdict",
+    )
+    parser.add_argument("--synthetic-bytes", type=int, default=1 << 20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--vocab-sizes", type=int, nargs="+", default=[400, 600, 1000]
+    )
+    parser.add_argument(
+        "--engines", nargs="+", default=["naive", "incremental"]
+    )
+    parser.add_argument("--bpe-vocab-size", type=int, default=1000)
+    parser.add_argument("--max-length", type=int, default=256)
+    parser.add_argument("--stride", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--num-workers", type=int, nargs="+", default=[0, 2, 4])
+    parser.add_argument("--max-batches", type=int, default=200)
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=["train", "encode_decode", "create_chunks", "dataloader"],
+        default=None,
+    )
+    args = parser.parse_args()
+
+    if args.corpus == "synthetic":
+        text = synthetic_corpus(args.synthetic_bytes, seed=args.seed)
+    else:
+        text = read_verdict()
+
+    sections = {
+        "train": lambda: bench_train(text, args.vocab_sizes, args.engines, args.repeat),
+        "encode_decode": lambda: bench_encode_decode(
+            text, args.bpe_vocab_size, args.repeat
+        ),
+        "create_chunks": lambda: _run_optional(
+            bench_create_chunks, text, args.bpe_vocab_size, args.max_length, args.stride
+        ),
+        "dataloader": lambda: _run_optional(
+            bench_dataloader,
+            text,
+            args.bpe_vocab_size,
+            args.max_length,
+            args.batch_size,
+            args.num_workers,
+            args.max_batches,
+        ),
+    }
+
+    results = {}
+    for name, run in sections.items():
+        if args.only and name not in args.only:
+            continue
+        print(f"Running {name}...", file=sys.stderr)
+        results[name] = run()
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "corpus": args.corpus,
+            "corpus_bytes": len(text.encode("utf-8")),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from common import read_verdict
+
+from loader_telemetry import percentile
+from tokenization_server import TokenizationClient, TokenizationServer
+from tokenization_strategy import BPETokenizationStrategy
+
+
+async def run_load(args, tokenizer_path, documents):
+    server = TokenizationServer(
+        tokenizer_path,
+        max_batch=args.max_batch,
+        max_latency_ms=args.max_latency_ms,
+        num_workers=args.num_workers,
+    )
+    await server.start()
+    host, port = server.address[:2]
+
+    latencies = []
+
+    async def worker(client, offset):
+        for i in range(args.requests):
+            document = documents[(offset + i) % len(documents)]
+            start = time.perf_counter()
+            await client.encode(document)
+            latencies.append(time.perf_counter() - start)
+
+    async with TokenizationClient(host, port, pool_size=args.pool_size) as client:
+        # Warm the pool workers before timing.
+        await asyncio.gather(*(client.encode(document) for document in documents[:32]))
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client, i) for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+
+    stats = server.stats()
+    await server.close()
+    print(f"requests     {len(latencies)} in {elapsed:.2f}s")
+    print(f"throughput   {len(latencies) / elapsed:,.0f} req/s")
+    print(f"latency p50  {1000 * percentile(latencies, 50):.2f} ms")
+    print(f"latency p99  {1000 * percentile(latencies, 99):.2f} ms")
+    print(f"mean batch   {stats['mean_batch_size']:.1f} requests")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load-test the local tokenization server."
+    )
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-latency-ms", type=float, default=2.0)
+    parser.add_argument("--num-workers", type=int, default=None)
+    parser.add_argument("--vocab-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    text = read_verdict()
+    documents = [line for line in text.splitlines() if line.strip()]
+    strategy = BPETokenizationStrategy()
+    strategy.train(text, vocab_size=args.vocab_size)
+
+    with tempfile.TemporaryDirectory() as directory:
+        tokenizer_path = os.path.join(directory, "bpe.tok")
+        strategy.save(tokenizer_path)
+        asyncio.run(run_load(args, tokenizer_path, documents))
+
+
+if __name__ == "__main__":
+    main()
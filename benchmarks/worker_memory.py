@@ -0,0 +1,102 @@
+import argparse
+import gc
+import pickle
+import random
+import string
+import time
+
+import common  # noqa: F401  (puts src/ on sys.path)
+import psutil
+from torch.utils.data import DataLoader, Dataset
+
+from gpt_dataset import FlatGPTDataset
+from tokenization_strategy import BPETokenizationStrategy
+from tokenizer import Tokenizer
+
+
+def random_words(num_words: int, seed: int) -> str:
+    # the-verdict caps BPE at a few thousand tokens; random words let the
+    # vocabulary grow to production sizes.
+    rng = random.Random(seed)
+    return " ".join(
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 12)))
+        for _ in range(num_words)
+    )
+
+
+def as_dict_tables(strategy: BPETokenizationStrategy) -> BPETokenizationStrategy:
+    # The layout before compact tables: four plain dicts pickled as-is.
+    legacy = BPETokenizationStrategy()
+    legacy._vocab = dict(strategy._vocab.items())
+    legacy._inverse_vocab = {token: i for i, token in legacy._vocab.items()}
+    legacy._bpe_merges = dict(strategy._bpe_merges.items())
+    legacy._bpe_ranks = {pair: rank for rank, pair in enumerate(legacy._bpe_merges)}
+    return legacy
+
+
+class MemoryProbe(Dataset):
+    # Each item reports the memory of the worker that produced it, measured
+    # after the dataset (and its tokenizer) has been unpickled there.
+    def __init__(self, dataset: Dataset, num_workers: int):
+        self._dataset = dataset
+        self._num_workers = num_workers
+
+    def __len__(self):
+        return self._num_workers
+
+    def __getitem__(self, index):
+        gc.collect()
+        info = psutil.Process().memory_full_info()
+        return {"rss": info.rss, "uss": info.uss}
+
+
+def worker_memory(dataset: Dataset, num_workers: int):
+    loader = DataLoader(
+        MemoryProbe(dataset, num_workers),
+        batch_size=None,
+        num_workers=num_workers,
+        multiprocessing_context="spawn",
+    )
+    return list(loader)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Per-worker memory of a dataset holding a BPE tokenizer, "
+        "with dict tables versus compact tables."
+    )
+    parser.add_argument("--vocab-size", type=int, default=32000)
+    parser.add_argument("--num-words", type=int, default=200_000)
+    parser.add_argument("--num-workers", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    text = random_words(args.num_words, args.seed)
+    strategy = BPETokenizationStrategy()
+    strategy.train_from_iterator([text], vocab_size=args.vocab_size, num_workers=0)
+    print(f"vocab {len(strategy.get_vocab())}, merges {len(strategy._bpe_merges)}")
+
+    for name, tables in (
+        ("dict", as_dict_tables(strategy)),
+        ("compact", strategy),
+    ):
+        dataset = FlatGPTDataset(tokenizer=Tokenizer(strategy=tables))
+        dataset.create_chunks(text[:100_000], max_length=256, stride=256)
+        # The token tensor travels through shared memory; the tokenizer is
+        # what gets pickled into every worker.
+        payload = pickle.dumps(dataset._tokenizer)
+        start = time.perf_counter()
+        pickle.loads(payload)
+        unpickle_ms = (time.perf_counter() - start) * 1000
+        workers = worker_memory(dataset, args.num_workers)
+        rss = sum(worker["rss"] for worker in workers) / len(workers) / 2**20
+        uss = sum(worker["uss"] for worker in workers) / len(workers) / 2**20
+        print(
+            f"{name:8s} tokenizer pickle {len(payload) / 2**20:5.2f} MiB, loads "
+            f"in {unpickle_ms:6.1f} ms  "
+            f"worker rss {rss:8.1f} MiB  uss {uss:8.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
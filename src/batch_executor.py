@@ -0,0 +1,100 @@
+import os
+from abc import ABC
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Optional
+
+_worker_strategy = None
+
+
+def _install_strategy(strategy):
+    global _worker_strategy
+    _worker_strategy = strategy
+
+
+def _run_chunk(method: str, chunk: List) -> List:
+    return getattr(_worker_strategy, method)(chunk)
+
+
+def _chunked(items: Iterable, chunk_size: int) -> Iterator[List]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, chunk_size)):
+        yield chunk
+
+
+class ExecutionBackend(ABC):
+    def __init__(self, num_workers: Optional[int] = None, chunk_size: int = 64):
+        assert chunk_size > 0
+        self._num_workers = num_workers or os.cpu_count() or 1
+        self._chunk_size = chunk_size
+
+    def run(self, strategy, method: str, items: Iterable) -> List[Any]:
+        results = []
+        for chunk_result in self._map_chunks(
+            strategy, method, _chunked(items, self._chunk_size)
+        ):
+            results.extend(chunk_result)
+        return results
+
+    def _map_chunks(
+        self, strategy, method: str, chunks: Iterator[List]
+    ) -> Iterator[List]:
+        raise NotImplementedError("Execution backend must implement _map_chunks")
+
+    def _map_ordered(
+        self, executor: Executor, fn, chunks: Iterator[List]
+    ) -> Iterator[List]:
+        # A bounded window of chunks is in flight so iterators of documents are
+        # never fully materialised; results are yielded in submission order.
+        pending = deque()
+        for chunk in chunks:
+            if len(pending) >= 2 * self._num_workers:
+                yield pending.popleft().result()
+            pending.append(executor.submit(fn, chunk))
+        while pending:
+            yield pending.popleft().result()
+
+
+class SerialBackend(ExecutionBackend):
+    def _map_chunks(self, strategy, method, chunks):
+        run = getattr(strategy, method)
+        for chunk in chunks:
+            yield run(chunk)
+
+
+class ThreadPoolBackend(ExecutionBackend):
+    def _map_chunks(self, strategy, method, chunks):
+        with ThreadPoolExecutor(max_workers=self._num_workers) as executor:
+            yield from self._map_ordered(
+                executor, getattr(strategy, method), chunks
+            )
+
+
+class ProcessPoolBackend(ExecutionBackend):
+    def _map_chunks(self, strategy, method, chunks):
+        # The strategy is pickled once per worker, not once per chunk.
+        with ProcessPoolExecutor(
+            max_workers=self._num_workers,
+            initializer=_install_strategy,
+            initargs=(strategy,),
+        ) as executor:
+            yield from self._map_ordered(
+                executor, partial(_run_chunk, method), chunks
+            )
+
+
+BACKENDS = {
+    "serial": SerialBackend,
+    "thread": ThreadPoolBackend,
+    "process": ProcessPoolBackend,
+}
+
+
+def get_backend(
+    backend: str = "serial",
+    num_workers: Optional[int] = None,
+    chunk_size: int = 64,
+) -> ExecutionBackend:
+    return BACKENDS[backend](num_workers=num_workers, chunk_size=chunk_size)
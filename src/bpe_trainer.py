@@ -0,0 +1,248 @@
+import heapq
+import os
+import re
+from collections import Counter, defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from utils import update_pair
+
+_LAST_SPACE = re.compile(r"\s\S*\Z")
+
+
+class IncrementalBPETrainer:
+    # Pair counts are built once and only the neighbours of each merged
+    # occurrence are updated. Ties are broken on the first occurrence of the
+    # pair, which is the order get_freq_pair(mode="most") picks them in.
+    def __init__(self, token_ids: List[int]):
+        size = len(token_ids)
+        self._values = list(token_ids)
+        self._prev = list(range(-1, size - 1))
+        self._next = list(range(1, size + 1))
+        if size:
+            self._next[-1] = -1
+
+        self._positions: Dict[Tuple[int, int], Set[int]] = defaultdict(set)
+        self._position_heaps: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        self._heap: List[Tuple[int, int, Tuple[int, int]]] = []
+
+        for position in range(size - 1):
+            pair = (token_ids[position], token_ids[position + 1])
+            self._positions[pair].add(position)
+            self._position_heaps[pair].append(position)
+
+        for pair in self._positions:
+            self._push(pair)
+
+    def train(self, first_id: int, vocab_size: int) -> Dict[Tuple[int, int], int]:
+        merges = {}
+        for new_id in range(first_id, vocab_size):
+            pair = self._pop_most_frequent()
+            if pair is None:
+                break
+            self._merge(pair, new_id)
+            merges[pair] = new_id
+        return merges
+
+    def _first_position(self, pair: Tuple[int, int]) -> int:
+        positions = self._positions[pair]
+        heap = self._position_heaps[pair]
+        while heap[0] not in positions:
+            heapq.heappop(heap)
+        return heap[0]
+
+    def _push(self, pair: Tuple[int, int]):
+        if self._positions.get(pair):
+            count = len(self._positions[pair])
+            heapq.heappush(self._heap, (-count, self._first_position(pair), pair))
+
+    def _pop_most_frequent(self):
+        while self._heap:
+            negative_count, first, pair = heapq.heappop(self._heap)
+            positions = self._positions.get(pair)
+            if (
+                positions
+                and len(positions) == -negative_count
+                and self._first_position(pair) == first
+            ):
+                return pair
+        return None
+
+    def _add(self, pair: Tuple[int, int], position: int, touched: Set):
+        self._positions[pair].add(position)
+        heapq.heappush(self._position_heaps[pair], position)
+        touched.add(pair)
+
+    def _remove(self, pair: Tuple[int, int], position: int, touched: Set):
+        positions = self._positions[pair]
+        positions.discard(position)
+        if not positions:
+            del self._positions[pair]
+            del self._position_heaps[pair]
+        touched.add(pair)
+
+    def _merge(self, pair: Tuple[int, int], new_id: int):
+        values, prev, next_ = self._values, self._prev, self._next
+        touched = set()
+
+        for position in sorted(self._positions[pair]):
+            # An earlier merge in this pass may have consumed the occurrence.
+            if position not in self._positions.get(pair, ()):
+                continue
+
+            right = next_[position]
+            left = prev[position]
+            after = next_[right]
+
+            if left != -1:
+                self._remove((values[left], values[position]), left, touched)
+                self._add((values[left], new_id), left, touched)
+            self._remove(pair, position, touched)
+            if after != -1:
+                self._remove((values[right], values[after]), right, touched)
+                self._add((new_id, values[after]), position, touched)
+                prev[after] = position
+
+            values[position] = new_id
+            next_[position] = after
+
+        for touched_pair in touched:
+            self._push(touched_pair)
+
+
+class WordBPETrainer:
+    # Learns merges over unique words weighted by their corpus counts. Pairs
+    # never cross word boundaries, which is how encode applies them too.
+    def __init__(self, word_counts: Dict[Tuple[int, ...], int]):
+        self._words = [list(word) for word in word_counts]
+        self._counts = list(word_counts.values())
+        self._pair_counts: Dict[Tuple[int, int], int] = defaultdict(int)
+        self._pair_words: Dict[Tuple[int, int], Set[int]] = defaultdict(set)
+
+        for index, word in enumerate(self._words):
+            self._count_pairs(index, word, 1)
+
+        self._heap = [(-count, pair) for pair, count in self._pair_counts.items()]
+        heapq.heapify(self._heap)
+
+    def train(self, first_id: int, vocab_size: int) -> Dict[Tuple[int, int], int]:
+        merges = {}
+        for new_id in range(first_id, vocab_size):
+            pair = self._pop_most_frequent()
+            if pair is None:
+                break
+            self._merge(pair, new_id)
+            merges[pair] = new_id
+        return merges
+
+    def _count_pairs(self, index: int, word: List[int], sign: int) -> Set:
+        count = self._counts[index] * sign
+        pairs = set()
+        for pair in zip(word, word[1:]):
+            self._pair_counts[pair] += count
+            pairs.add(pair)
+            if sign > 0:
+                self._pair_words[pair].add(index)
+        return pairs
+
+    def _pop_most_frequent(self):
+        while self._heap:
+            negative_count, pair = heapq.heappop(self._heap)
+            if negative_count and self._pair_counts.get(pair) == -negative_count:
+                return pair
+        return None
+
+    def _merge(self, pair: Tuple[int, int], new_id: int):
+        touched = set()
+        for index in self._pair_words.pop(pair):
+            word = self._words[index]
+            touched |= self._count_pairs(index, word, -1)
+            merged = update_pair(word, pair, new_id)
+            self._words[index] = merged
+            touched |= self._count_pairs(index, merged, 1)
+
+        for touched_pair in touched:
+            count = self._pair_counts[touched_pair]
+            if count > 0:
+                heapq.heappush(self._heap, (-count, touched_pair))
+            else:
+                del self._pair_counts[touched_pair]
+                self._pair_words.pop(touched_pair, None)
+
+
+def count_words(text: str) -> Counter:
+    return Counter(text.split())
+
+
+def read_file_chunks(
+    paths: Iterable[Union[str, os.PathLike]],
+    chunk_size: int,
+) -> Iterator[str]:
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            carry = ""
+            while True:
+                block = f.read(chunk_size)
+                if not block:
+                    break
+                block = carry + block
+                # Hold back a trailing partial word for the next block. A
+                # word longer than chunk_size is cut instead, so the carry
+                # never grows past one block.
+                last_space = _LAST_SPACE.search(block)
+                if last_space is None or len(block) - last_space.start() > chunk_size:
+                    carry = ""
+                    yield block
+                    continue
+                carry = block[last_space.start() :]
+                yield block[: last_space.start()]
+            if carry:
+                yield carry
+
+
+def text_chunks(
+    texts: Iterable[str],
+    files: Iterable[Union[str, os.PathLike]],
+    chunk_size: int,
+) -> Iterator[str]:
+    # texts are taken as text and files as paths; a str is never guessed to
+    # be either.
+    for text in texts:
+        if not isinstance(text, str):
+            raise TypeError(
+                f"texts must be str, got {type(text).__name__}; pass paths as files"
+            )
+        yield text
+    yield from read_file_chunks(files, chunk_size)
+
+
+def count_words_parallel(
+    texts: Iterable[str] = (),
+    files: Iterable[Union[str, os.PathLike]] = (),
+    num_workers: Optional[int] = None,
+    chunk_size: int = 1 << 20,
+) -> Counter:
+    chunks = text_chunks(texts, files, chunk_size)
+    word_counts = Counter()
+
+    if num_workers == 0:
+        for chunk in chunks:
+            word_counts.update(count_words(chunk))
+        return word_counts
+
+    num_workers = num_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        # Only a couple of chunks per worker are in flight, so memory stays
+        # bounded however large the corpus is.
+        max_pending = 2 * num_workers
+        pending = set()
+        for chunk in chunks:
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    word_counts.update(future.result())
+            pending.add(executor.submit(count_words, chunk))
+        for future in pending:
+            word_counts.update(future.result())
+
+    return word_counts
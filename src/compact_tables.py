@@ -0,0 +1,82 @@
+from array import array
+from bisect import bisect_left
+from typing import Iterator, Mapping, Optional, Tuple
+
+# Read-only vocab and merge tables held in a few flat buffers instead of
+# dicts of str/tuple objects. They are a storage and pickling format: they
+# pickle as those buffers, so shipping a tokenizer to DataLoader workers
+# copies bytes rather than rebuilding every dict entry in every worker.
+# Encoding does not look anything up in them; the strategy builds plain
+# dicts from them in the processes that actually tokenize.
+
+
+class CompactVocab(Mapping):
+    # id -> token over one utf-8 blob with an offsets array, laid out like
+    # the tokenizer artifact.
+    def __init__(self, vocab: Mapping[int, str]):
+        ids = sorted(vocab)
+        self._ids = array("i", ids)
+        self._offsets = array("I", [0])
+        blob = bytearray()
+        for i in ids:
+            blob += vocab[i].encode("utf-8")
+            self._offsets.append(len(blob))
+        self._blob = bytes(blob)
+        self._dense = ids == list(range(len(ids)))
+
+    def _position(self, token_id: int) -> Optional[int]:
+        if self._dense:
+            return token_id if 0 <= token_id < len(self._ids) else None
+        position = bisect_left(self._ids, token_id)
+        if position < len(self._ids) and self._ids[position] == token_id:
+            return position
+        return None
+
+    def token_bytes(self, token_id: int) -> bytes:
+        position = self._position(token_id)
+        if position is None:
+            raise KeyError(token_id)
+        return self._blob[self._offsets[position] : self._offsets[position + 1]]
+
+    def __getitem__(self, token_id: int) -> str:
+        return str(self.token_bytes(token_id), "utf-8")
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, token_id) -> bool:
+        return isinstance(token_id, int) and self._position(token_id) is not None
+
+
+class CompactMerges:
+    # Merge pairs as a flat (N, 2) int32 array in rank order. Merge ids are
+    # consecutive in rank order, as the trainers produce them, so only the
+    # first is kept.
+    def __init__(self, merges: Mapping[Tuple[int, int], int]):
+        self._first_id = next(iter(merges.values()), 0)
+        self._pairs = array("i")
+        for rank, (pair, new_id) in enumerate(merges.items()):
+            if new_id != self._first_id + rank:
+                raise ValueError("Merge ids must be consecutive in rank order")
+            self._pairs.extend(pair)
+
+    def items(self) -> Iterator[Tuple[Tuple[int, int], int]]:
+        pairs = self._pairs
+        for rank in range(len(self)):
+            yield (pairs[2 * rank], pairs[2 * rank + 1]), self._first_id + rank
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return (pair for pair, _ in self.items())
+
+    def __len__(self) -> int:
+        return len(self._pairs) // 2
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CompactMerges):
+            return NotImplemented
+        return self._pairs == other._pairs and (
+            self._first_id == other._first_id or not self._pairs
+        )
@@ -1,12 +1,39 @@
-from gpt_dataset import GPTDataset
-from torch.utils.data import DataLoader
+import itertools
+import os
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from torch.utils.data import (
+    DataLoader,
+    Dataset,
+    IterableDataset,
+    Sampler,
+    default_collate,
+)
+
+from loader_telemetry import InstrumentedDataLoader
+from profiling import PROFILER
+
+
+class _ProfiledCollate:
+    # Module-level so worker processes can unpickle it; collation timed in a
+    # worker is recorded in that worker's profiler.
+    def __init__(self, collate_fn: Callable):
+        self._collate_fn = collate_fn
+
+    def __call__(self, batch):
+        with PROFILER.stage("loader.collate"):
+            collated = self._collate_fn(batch)
+        PROFILER.count("loader.samples_collated", len(batch))
+        return collated
 
 class CreateDataLoader:
     def __init__(
         self,
-        dataset: GPTDataset,
+        dataset: Dataset,
     ):
         self._dataset = dataset
+        self.calibration_results: List[Dict] = []
 
     def execute(
         self,
@@ -14,11 +41,119 @@ class CreateDataLoader:
         shuffle: bool = True,
         drop_last: bool = True,
         num_workers: int = 0,
+        sampler: Optional[Sampler] = None,
+        batch_sampler: Optional[Sampler] = None,
+        collate_fn: Optional[Callable] = None,
+        pin_memory: bool = False,
+        persistent_workers: bool = False,
+        prefetch_factor: Optional[int] = None,
     ):
+        worker_options = {}
+        if num_workers > 0:
+            # DataLoader rejects these options without worker processes.
+            worker_options = {
+                "persistent_workers": persistent_workers,
+                "prefetch_factor": prefetch_factor,
+            }
+        if PROFILER.enabled:
+            collate_fn = _ProfiledCollate(collate_fn or default_collate)
+
+        if batch_sampler is not None:
+            # The batch sampler owns batching, shuffling and drop_last.
+            return DataLoader(
+                self._dataset,
+                batch_sampler=batch_sampler,
+                num_workers=num_workers,
+                collate_fn=collate_fn,
+                pin_memory=pin_memory,
+                **worker_options,
+            )
+
+        order_options = {
+            "shuffle": shuffle if sampler is None else False,
+            "sampler": sampler,
+        }
+        if isinstance(self._dataset, IterableDataset):
+            # A stream yields its own order; DataLoader rejects both options.
+            order_options = {}
         return DataLoader(
             self._dataset,
             batch_size=batch_size,
-            shuffle=shuffle,
             drop_last=drop_last,
-            num_workers=num_workers
+            num_workers=num_workers,
+            collate_fn=collate_fn,
+            **order_options,
+            pin_memory=pin_memory,
+            **worker_options,
         )
+
+    def execute_instrumented(
+        self,
+        calibrate: bool = False,
+        worker_candidates: Optional[Sequence[int]] = None,
+        prefetch_candidates: Sequence[int] = (2, 4),
+        calibration_batches: int = 50,
+        **kwargs,
+    ) -> InstrumentedDataLoader:
+        if calibrate:
+            kwargs.update(
+                self.calibrate(
+                    worker_candidates,
+                    prefetch_candidates,
+                    calibration_batches,
+                    **kwargs,
+                )
+            )
+        settings = {
+            "num_workers": kwargs.get("num_workers", 0),
+            "prefetch_factor": kwargs.get("prefetch_factor"),
+        }
+        return InstrumentedDataLoader(self.execute(**kwargs), settings=settings)
+
+    def calibrate(
+        self,
+        worker_candidates: Optional[Sequence[int]] = None,
+        prefetch_candidates: Sequence[int] = (2, 4),
+        calibration_batches: int = 50,
+        **kwargs,
+    ) -> Dict:
+        # Times the first calibration_batches batches (worker start-up
+        # included) for every setting and returns the fastest one.
+        if worker_candidates is None:
+            cpus = os.cpu_count() or 1
+            worker_candidates = sorted({0, 1, 2, 4, cpus} & set(range(cpus + 1)))
+
+        candidates = []
+        for num_workers in worker_candidates:
+            if num_workers == 0:
+                candidates.append({"num_workers": 0, "prefetch_factor": None})
+            for prefetch_factor in prefetch_candidates if num_workers else ():
+                candidates.append(
+                    {"num_workers": num_workers, "prefetch_factor": prefetch_factor}
+                )
+
+        self.calibration_results = []
+        for candidate in candidates:
+            options = {**kwargs, **candidate, "persistent_workers": False}
+            start = time.perf_counter()
+            batches = sum(
+                1
+                for _ in itertools.islice(
+                    self.execute(**options), calibration_batches
+                )
+            )
+            seconds = time.perf_counter() - start
+            self.calibration_results.append(
+                {
+                    **candidate,
+                    "batches": batches,
+                    "seconds": seconds,
+                    "batches_per_s": batches / seconds if seconds else 0.0,
+                }
+            )
+
+        best = max(self.calibration_results, key=lambda result: result["batches_per_s"])
+        return {
+            "num_workers": best["num_workers"],
+            "prefetch_factor": best["prefetch_factor"],
+        }
@@ -1,16 +1,71 @@
-from typing import Optional
+from typing import Iterator, List, Optional
 import torch
 
 
 class CreateEmbedding:
-    def __init__(self, vocab_size: int, output_dim: int, seed: Optional[int]):
+    def __init__(
+        self,
+        vocab_size: int,
+        output_dim: int,
+        seed: Optional[int],
+        context_length: Optional[int] = None,
+        dtype: Optional[torch.dtype] = None,
+        sparse: bool = False,
+    ):
         if seed:
             torch.manual_seed(seed)
 
-        self._embedding_layer = torch.nn.Embedding(vocab_size, output_dim)
+        self._embedding_layer = torch.nn.Embedding(
+            vocab_size, output_dim, sparse=sparse, dtype=dtype
+        )
+        self._position_layer = None
+        if context_length is not None:
+            self._position_layer = torch.nn.Embedding(
+                context_length, output_dim, dtype=dtype
+            )
+        self._sparse = sparse
+        self._tied_projection = None
 
     def get_weight(self) -> torch.Tensor:
         return self._embedding_layer.weight
-    
+
     def embbed(self, input_tensor: torch.Tensor) -> torch.Tensor:
-        return self._embedding_layer(input_tensor)
\ No newline at end of file
+        embeddings = self._embedding_layer(input_tensor)
+        if self._position_layer is not None:
+            # The lookup output is a fresh tensor, so positions are added in
+            # place instead of materialising a second full-size intermediate.
+            seq_len = input_tensor.shape[-1]
+            embeddings.add_(self._position_layer.weight[:seq_len])
+        return embeddings
+
+    def tie_output_projection(self) -> torch.nn.Linear:
+        # The projection shares the token table, so logits = hidden @ W.T
+        # without a second vocab_size x output_dim matrix.
+        if self._sparse:
+            raise ValueError(
+                "A tied projection produces dense gradients; use sparse=False"
+            )
+        if self._tied_projection is None:
+            vocab_size, output_dim = self._embedding_layer.weight.shape
+            projection = torch.nn.Linear(output_dim, vocab_size, bias=False)
+            projection.weight = self._embedding_layer.weight
+            self._tied_projection = projection
+        return self._tied_projection
+
+    def parameters(self) -> Iterator[torch.nn.Parameter]:
+        yield self._embedding_layer.weight
+        if self._position_layer is not None:
+            yield self._position_layer.weight
+
+    def create_optimizers(self, lr: float = 1e-3) -> List[torch.optim.Optimizer]:
+        # Sparse gradients need SparseAdam; the small position table stays on
+        # a dense optimizer.
+        if not self._sparse:
+            return [torch.optim.AdamW(self.parameters(), lr=lr)]
+
+        optimizers = [torch.optim.SparseAdam([self._embedding_layer.weight], lr=lr)]
+        if self._position_layer is not None:
+            optimizers.append(
+                torch.optim.AdamW([self._position_layer.weight], lr=lr)
+            )
+        return optimizers
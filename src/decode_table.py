@@ -0,0 +1,78 @@
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+
+class DecodeTable:
+    # Every token's utf-8 bytes (plus an optional separator) live in one
+    # buffer with an offsets array, so a whole batch of ids is turned into
+    # bytes with a handful of numpy gathers instead of one lookup per id.
+    def __init__(
+        self,
+        vocab: Dict[int, str],
+        separator: str = "",
+        unknown: Optional[str] = None,
+    ):
+        size = max(vocab, default=-1) + 1
+        self._size = size
+        self._unknown = unknown
+        self._separator_length = len(separator.encode("utf-8"))
+
+        known = np.zeros(size + 1, dtype=bool)
+        offsets = np.zeros(size + 2, dtype=np.int64)
+        buffer = bytearray()
+        for i in range(size + 1):
+            token = vocab.get(i) if i < size else None
+            if token is not None:
+                known[i] = True
+            else:
+                token = unknown or ""
+            buffer += (token + separator).encode("utf-8")
+            offsets[i + 1] = len(buffer)
+
+        self._known = known
+        self._offsets = offsets
+        self._lengths = np.diff(offsets)
+        self._buffer = np.frombuffer(bytes(buffer), dtype=np.uint8)
+
+    def decode(self, ids) -> Union[str, List[str]]:
+        ids = _as_numpy(ids)
+        if ids.ndim == 1:
+            return self._decode_rows(ids[np.newaxis, :])[0]
+        if ids.ndim != 2:
+            raise ValueError(f"Expected 1-D or 2-D ids, got {ids.ndim} dimensions")
+        return self._decode_rows(ids)
+
+    def _decode_rows(self, ids: np.ndarray) -> List[str]:
+        ids = ids.astype(np.int64, copy=False)
+        out_of_range = (ids < 0) | (ids >= self._size)
+        ids = np.where(out_of_range, self._size, ids)
+        if self._unknown is None and not self._known[ids].all():
+            bad = ids[~self._known[ids]]
+            raise KeyError(int(bad[0]))
+
+        flat_ids = ids.ravel()
+        lengths = self._lengths[flat_ids]
+        ends = np.cumsum(lengths)
+        # For every output byte: its token's start in the buffer plus its
+        # position inside the token.
+        shift = np.repeat(self._offsets[flat_ids] - (ends - lengths), lengths)
+        gathered = self._buffer[np.arange(ends[-1] if len(ends) else 0) + shift]
+        data = gathered.tobytes()
+
+        row_ends = ends.reshape(ids.shape)[:, -1] if ids.shape[1] else None
+        rows = []
+        start = 0
+        for row in range(ids.shape[0]):
+            end = int(row_ends[row]) if row_ends is not None else 0
+            # Drop the separator that follows the last token of each row.
+            trimmed = end - self._separator_length if end > start else end
+            rows.append(data[start:trimmed].decode("utf-8", errors="replace"))
+            start = end
+        return rows
+
+
+def _as_numpy(ids) -> np.ndarray:
+    if hasattr(ids, "detach"):
+        ids = ids.detach().cpu().numpy()
+    return np.asarray(ids)
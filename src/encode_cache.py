@@ -0,0 +1,269 @@
+import argparse
+import hashlib
+import mmap
+import os
+import sys
+import time
+from array import array
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from tokenization_strategy import TokenizationStrategy
+
+_SUFFIX = ".ids"
+
+
+class CacheEntry(NamedTuple):
+    key: str
+    path: str
+    size: int
+    last_used: float
+
+
+def content_key(text: str, fingerprint: str) -> str:
+    digest = hashlib.sha256(fingerprint.encode("ascii"))
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class EncodeCache:
+    # Token ids of previously encoded texts, one little-endian int32 file per
+    # (content, tokenizer fingerprint) under root/<key[:2]>/<key>.ids. File
+    # mtimes are the LRU clock: a hit touches its file and eviction removes
+    # the oldest, so several processes can share one cache without an index.
+    # Texts shorter than min_chars are encoded directly and never stored.
+    def __init__(
+        self,
+        root: Union[str, os.PathLike],
+        max_bytes: Optional[int] = None,
+        min_chars: int = 1 << 12,
+    ):
+        assert max_bytes is None or max_bytes > 0
+
+        self._root = os.fspath(root)
+        self._max_bytes = max_bytes
+        self._min_chars = min_chars
+        self._total_bytes: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+
+    def encode(self, strategy: TokenizationStrategy, text: str) -> List[int]:
+        if len(text) < self._min_chars:
+            return strategy.encode(text)
+
+        key = content_key(text, strategy.fingerprint())
+        ids = self.get(key)
+        if ids is not None:
+            return ids.tolist()
+
+        ids = strategy.encode(text)
+        self.put(key, ids)
+        return ids
+
+    def encode_documents(
+        self,
+        strategy: TokenizationStrategy,
+        documents: Iterable[str],
+        encode_batch: Optional[Callable[[Iterable[str]], List[List[int]]]] = None,
+    ) -> List[List[int]]:
+        # Documents are looked up as encode_batch pulls them, and only the
+        # misses are handed on, so an iterator is never read ahead of it.
+        encode_batch = encode_batch or strategy.encode_batch
+        fingerprint = strategy.fingerprint()
+        results: List[Optional[List[int]]] = []
+        missing: List[Tuple[int, Optional[str]]] = []
+
+        def misses() -> Iterator[str]:
+            for text in documents:
+                key = None
+                if len(text) >= self._min_chars:
+                    key = content_key(text, fingerprint)
+                    ids = self.get(key)
+                    if ids is not None:
+                        results.append(ids.tolist())
+                        continue
+                missing.append((len(results), key))
+                results.append(None)
+                yield text
+
+        encoded = encode_batch(misses())
+        for (i, key), ids in zip(missing, encoded):
+            if key is not None:
+                self.put(key, ids)
+            results[i] = ids
+        return results
+
+    def get(self, key: str) -> Optional[memoryview]:
+        path = self._path(key)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        with f:
+            if os.fstat(f.fileno()).st_size == 0:
+                ids = memoryview(b"").cast("i")
+            else:
+                # The view keeps the mapping alive after the file is closed.
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                ids = memoryview(mapped).cast("i")
+        if sys.byteorder != "little":
+            swapped = array("i", ids.tobytes())
+            swapped.byteswap()
+            ids = memoryview(swapped)
+
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted by another process since it was opened.
+            pass
+        self.hits += 1
+        return ids
+
+    def put(self, key: str, ids: Sequence[int]):
+        data = array("i", ids)
+        if sys.byteorder != "little":
+            data.byteswap()
+        size = len(data) * data.itemsize
+        if self._max_bytes is not None and size > self._max_bytes:
+            return
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written aside and renamed, so readers never see a partial file.
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(data.tobytes())
+        os.replace(temporary, path)
+
+        if self._max_bytes is not None:
+            if self._total_bytes is None:
+                self._total_bytes = self.stats()["bytes"]
+            else:
+                self._total_bytes += size
+            if self._total_bytes > self._max_bytes:
+                self.prune(self._max_bytes)
+
+    def entries(self) -> List[CacheEntry]:
+        # Most recently used first.
+        entries = []
+        if not os.path.isdir(self._root):
+            return entries
+        for shard in os.scandir(self._root):
+            if not shard.is_dir():
+                continue
+            for item in os.scandir(shard.path):
+                if not item.name.endswith(_SUFFIX):
+                    continue
+                try:
+                    stat = item.stat()
+                except FileNotFoundError:
+                    continue
+                key = item.name[: -len(_SUFFIX)]
+                entries.append(CacheEntry(key, item.path, stat.st_size, stat.st_mtime))
+        entries.sort(key=lambda entry: entry.last_used, reverse=True)
+        return entries
+
+    def prune(
+        self,
+        max_bytes: Optional[int] = None,
+        older_than: Optional[float] = None,
+    ) -> int:
+        # Drops entries unused for older_than seconds, then the least
+        # recently used until at most max_bytes remain. Returns the number
+        # of entries removed.
+        entries = self.entries()
+        keep = []
+        removed = 0
+        now = time.time()
+        for entry in entries:
+            if older_than is not None and now - entry.last_used > older_than:
+                removed += self._remove(entry)
+            else:
+                keep.append(entry)
+
+        total = sum(entry.size for entry in keep)
+        while keep and max_bytes is not None and total > max_bytes:
+            entry = keep.pop()
+            total -= entry.size
+            removed += self._remove(entry)
+
+        self._total_bytes = total
+        return removed
+
+    def clear(self) -> int:
+        return self.prune(max_bytes=0)
+
+    def stats(self) -> Dict[str, int]:
+        entries = self.entries()
+        return {
+            "entries": len(entries),
+            "bytes": sum(entry.size for entry in entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._root, key[:2], key + _SUFFIX)
+
+    @staticmethod
+    def _remove(entry: CacheEntry) -> int:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            return 0
+        return 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or prune an encode cache.")
+    parser.add_argument("root", help="Cache directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    inspect = commands.add_parser("inspect", help="Show size and recent entries")
+    inspect.add_argument("--limit", type=int, default=10)
+
+    prune = commands.add_parser("prune", help="Evict least recently used entries")
+    prune.add_argument("--max-bytes", type=int, default=None)
+    prune.add_argument(
+        "--older-than-days",
+        type=float,
+        default=None,
+        help="Also drop entries unused for this many days",
+    )
+
+    commands.add_parser("clear", help="Remove every entry")
+    args = parser.parse_args()
+
+    cache = EncodeCache(args.root)
+    if args.command == "inspect":
+        entries = cache.entries()
+        total = sum(entry.size for entry in entries)
+        print(f"{len(entries)} entries, {total} bytes")
+        for entry in entries[: args.limit]:
+            last_used = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry.last_used))
+            print(f"{entry.key}  {entry.size // 4:>10} tokens  {last_used}")
+    elif args.command == "prune":
+        older_than = None
+        if args.older_than_days is not None:
+            older_than = args.older_than_days * 86400
+        removed = cache.prune(args.max_bytes, older_than)
+        print(f"Removed {removed} entries, {cache.stats()['bytes']} bytes left")
+    else:
+        print(f"Removed {cache.clear()} entries")
+
+
+if __name__ == "__main__":
+    main()
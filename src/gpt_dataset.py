@@ -1,6 +1,10 @@
+import bisect
+from typing import Iterator, List, Optional
+
 import torch
-from torch.utils.data import Dataset
+from torch.utils.data import Dataset, Sampler
 
+from profiling import PROFILER
 from tokenizer import Tokenizer
 
 class GPTDataset(Dataset):
@@ -10,16 +14,102 @@ class GPTDataset(Dataset):
         self._tokenizer = tokenizer
         
     def create_chunks(self, text: str, max_length: int, stride: int,):
-        token_ids = self._tokenizer.encode(text)
-        for i in range(0, len(token_ids)-max_length, stride):
-            input_chunk = token_ids[i:i+max_length]
-            target_chunk = token_ids[i+1: i+max_length+1]
-            self._input_ids.append(torch.tensor(input_chunk))
-            self._target_ids.append(torch.tensor(target_chunk))
+        with PROFILER.stage("dataset.encode"):
+            token_ids = self._tokenizer.encode(text)
+        windows = range(0, len(token_ids)-max_length, stride)
+        with PROFILER.stage("dataset.windows"):
+            for i in windows:
+                input_chunk = token_ids[i:i+max_length]
+                target_chunk = token_ids[i+1: i+max_length+1]
+                self._input_ids.append(torch.tensor(input_chunk))
+                self._target_ids.append(torch.tensor(target_chunk))
+        PROFILER.count("dataset.windows_created", len(windows))
     
     def __len__(self):
         return len(self._input_ids)
     
     def __getitem__(self, index):
         return self._input_ids[index], self._target_ids[index]
-        
\ No newline at end of file
+
+
+def storage_dtype(max_token_id: int) -> torch.dtype:
+    if max_token_id < 2**16:
+        return torch.uint16
+    return torch.int32
+
+
+class FlatGPTDataset(Dataset):
+    # Same windows as GPTDataset, but each create_chunks call keeps a single
+    # flat token tensor and (input, target) pairs are sliced out of it on
+    # demand. Ids come back as int32; call .long() on a batch where int64 is
+    # required (e.g. cross_entropy targets).
+    def __init__(self, tokenizer: Tokenizer,):
+        self._tokenizer = tokenizer
+        self._segments: List[torch.Tensor] = []
+        self._max_lengths: List[int] = []
+        self._strides: List[int] = []
+        self._cumulative_windows: List[int] = []
+
+    def create_chunks(self, text: str, max_length: int, stride: int,):
+        with PROFILER.stage("dataset.encode"):
+            token_ids = self._tokenizer.encode(text)
+        num_windows = len(range(0, len(token_ids) - max_length, stride))
+        if num_windows == 0:
+            return
+
+        dtype = storage_dtype(max(token_ids))
+        with PROFILER.stage("dataset.windows"):
+            self._segments.append(torch.tensor(token_ids, dtype=dtype))
+        PROFILER.count("dataset.windows_created", num_windows)
+        self._max_lengths.append(max_length)
+        self._strides.append(stride)
+        total = self._cumulative_windows[-1] if self._cumulative_windows else 0
+        self._cumulative_windows.append(total + num_windows)
+
+    def __len__(self):
+        return self._cumulative_windows[-1] if self._cumulative_windows else 0
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"Window {index} out of range for {len(self)} windows")
+
+        segment = bisect.bisect_right(self._cumulative_windows, index)
+        if segment:
+            index -= self._cumulative_windows[segment - 1]
+        start = index * self._strides[segment]
+        max_length = self._max_lengths[segment]
+
+        window = self._segments[segment][start : start + max_length + 1]
+        if window.dtype == torch.uint16:
+            # uint16 has little kernel support; widen the small window only.
+            window = window.to(torch.int32)
+        return window[:-1], window[1:]
+
+
+class RandomWindowSampler(Sampler):
+    def __init__(
+        self,
+        dataset: Dataset,
+        num_samples: Optional[int] = None,
+        generator: Optional[torch.Generator] = None,
+        block_size: int = 1 << 16,
+    ):
+        self._num_windows = len(dataset)
+        self._num_samples = num_samples or self._num_windows
+        self._generator = generator
+        self._block_size = block_size
+
+    def __iter__(self) -> Iterator[int]:
+        # Offsets are drawn in blocks, so the window range is never enumerated.
+        remaining = self._num_samples
+        while remaining > 0:
+            size = min(remaining, self._block_size)
+            yield from torch.randint(
+                self._num_windows, (size,), generator=self._generator
+            ).tolist()
+            remaining -= size
+
+    def __len__(self):
+        return self._num_samples
@@ -0,0 +1,75 @@
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import torch
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[rank]
+
+
+def count_tokens(batch) -> int:
+    # The first tensor of a batch is the input ids.
+    if isinstance(batch, torch.Tensor):
+        return batch.numel()
+    if isinstance(batch, (list, tuple)) and batch:
+        return count_tokens(batch[0])
+    if isinstance(batch, dict) and batch:
+        return count_tokens(next(iter(batch.values())))
+    return 0
+
+
+class InstrumentedDataLoader:
+    # Wraps any iterable of batches and records how long the consumer waits
+    # on each next() (fetch latency) against the time it spends between
+    # fetches. A high wait fraction means training is input-bound.
+    def __init__(self, loader: Iterable, settings: Optional[Dict] = None):
+        self._loader = loader
+        self.settings = settings or {}
+        self.reset()
+
+    def reset(self):
+        self._fetch_latencies: List[float] = []
+        self._tokens = 0
+        self._elapsed = 0.0
+
+    def __len__(self):
+        return len(self._loader)
+
+    def __iter__(self) -> Iterator:
+        start = time.perf_counter()
+        iterator = iter(self._loader)
+        try:
+            while True:
+                fetch_start = time.perf_counter()
+                try:
+                    batch = next(iterator)
+                except StopIteration:
+                    return
+                self._fetch_latencies.append(time.perf_counter() - fetch_start)
+                self._tokens += count_tokens(batch)
+                yield batch
+        finally:
+            self._elapsed += time.perf_counter() - start
+
+    def stats(self) -> Dict[str, float]:
+        batches = len(self._fetch_latencies)
+        wait = sum(self._fetch_latencies)
+        elapsed = self._elapsed or wait
+        return {
+            "batches": batches,
+            "tokens": self._tokens,
+            "elapsed_s": elapsed,
+            "batches_per_s": batches / elapsed if elapsed else 0.0,
+            "tokens_per_s": self._tokens / elapsed if elapsed else 0.0,
+            "fetch_p50_ms": 1000 * percentile(self._fetch_latencies, 50),
+            "fetch_p90_ms": 1000 * percentile(self._fetch_latencies, 90),
+            "fetch_p99_ms": 1000 * percentile(self._fetch_latencies, 99),
+            "wait_s": wait,
+            "wait_fraction": wait / elapsed if elapsed else 0.0,
+            **{f"setting_{name}": value for name, value in self.settings.items()},
+        }
@@ -1,13 +1,31 @@
 from gpt_dataset import GPTDataset
 from create_dataloader import CreateDataLoader
 from create_embedding import CreateEmbedding
+from encode_cache import EncodeCache
 from tokenizer import Tokenizer
 from tokenization_strategy import (
     BPETokenizationStrategy,
 )
 
+import os
 import re
 
+ARTIFACT_PATH = "artifacts/the-verdict-bpe-1000.tok"
+ENCODE_CACHE_PATH = "artifacts/encode-cache"
+ENCODE_CACHE_MAX_BYTES = 1 << 30
+
+
+def load_or_train_strategy(text: str) -> BPETokenizationStrategy:
+    if os.path.exists(ARTIFACT_PATH):
+        return BPETokenizationStrategy.load(ARTIFACT_PATH)
+
+    strategy = BPETokenizationStrategy()
+    strategy.train(text, vocab_size=1000, allowed_special={"<|endoftext|>"})
+    os.makedirs(os.path.dirname(ARTIFACT_PATH), exist_ok=True)
+    strategy.save(ARTIFACT_PATH)
+    return strategy
+
+
 def main():
     text = "This is a sample text"
     preprocessed = re.split(r'([,.:;?_!"()\']|--|\s)', text)
@@ -16,9 +34,9 @@ def main():
     with open("assets/the-verdict.txt", "r", encoding="utf-8") as f:  
         text = f.read()
         
-    strategy = BPETokenizationStrategy()
-    strategy.train(text, vocab_size=1000, allowed_special={"<|endoftext|>"})
-    dataset = GPTDataset(tokenizer=Tokenizer(strategy=strategy))
+    strategy = load_or_train_strategy(text)
+    encode_cache = EncodeCache(ENCODE_CACHE_PATH, max_bytes=ENCODE_CACHE_MAX_BYTES)
+    dataset = GPTDataset(tokenizer=Tokenizer(strategy=strategy, encode_cache=encode_cache))
     dataset.create_chunks(text, max_length=4, stride=1)
     create_data_loader = CreateDataLoader(dataset=dataset)
     dataloader = create_data_loader.execute(batch_size=1, shuffle=False)
@@ -0,0 +1,78 @@
+import re
+from typing import Iterable, Iterator, Tuple, Union
+
+# Tokens produced by re.split(r'([,.:;?_!"()\']|--|\s)', text) after dropping
+# the empty and whitespace-only pieces, matched directly instead.
+REGEX_TOKEN_PATTERN = r"""--|[,.:;?_!"()']|(?:(?!--)[^,.:;?_!"()'\s])+"""
+WHITESPACE_TOKEN_PATTERN = r"\S+"
+SPECIAL_TOKEN_PATTERN = re.compile(r"<\|[^\s|]+\|>")
+
+_TERMINAL = None
+
+
+class PreTokenizer:
+    # Special tokens are found with a character trie. A compiled class of
+    # their first characters jumps straight to candidate positions, the trie
+    # gives the longest special starting there, and the compiled splitting
+    # pattern runs over the gaps in between via finditer(pos, endpos), so the
+    # input is scanned once and never copied into sub-strings.
+    def __init__(
+        self,
+        special_tokens: Iterable[str],
+        pattern: Union[str, "re.Pattern[str]"] = WHITESPACE_TOKEN_PATTERN,
+    ):
+        self._trie = {}
+        first_chars = set()
+        for token in special_tokens:
+            if not token:
+                continue
+            node = self._trie
+            for char in token:
+                node = node.setdefault(char, {})
+            node[_TERMINAL] = True
+            first_chars.add(token[0])
+
+        self._first_char = None
+        if first_chars:
+            self._first_char = re.compile(
+                "[" + "".join(re.escape(char) for char in sorted(first_chars)) + "]"
+            )
+        self._pattern = re.compile(pattern) if isinstance(pattern, str) else pattern
+
+    def spans(self, text: str) -> Iterator[Tuple[int, int, bool]]:
+        # Yields (start, end, is_special) offsets into text, in order.
+        position = 0
+        search_from = 0
+        while self._first_char is not None:
+            candidate = self._first_char.search(text, search_from)
+            if candidate is None:
+                break
+            start = candidate.start()
+            end = self._match_special(text, start)
+            if end == -1:
+                search_from = start + 1
+                continue
+
+            yield from self._split(text, position, start)
+            yield start, end, True
+            position = search_from = end
+        yield from self._split(text, position, len(text))
+
+    def _match_special(self, text: str, start: int) -> int:
+        node = self._trie
+        end = -1
+        for i in range(start, len(text)):
+            node = node.get(text[i])
+            if node is None:
+                break
+            if _TERMINAL in node:
+                end = i + 1
+        return end
+
+    def _split(self, text: str, start: int, end: int) -> Iterator[Tuple[int, int, bool]]:
+        for match in self._pattern.finditer(text, start, end):
+            yield match.start(), match.end(), False
+
+
+def special_tokens_in(tokens: Iterable[str]):
+    return [token for token in tokens if SPECIAL_TOKEN_PATTERN.fullmatch(token)]
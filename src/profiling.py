@@ -0,0 +1,108 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+from typing import Dict, List, Optional
+
+# Shared no-op context returned by Profiler.stage() while profiling is off, so
+# a disabled call site costs one attribute check and one method call.
+_DISABLED_STAGE = nullcontext()
+
+
+class _Stage:
+    __slots__ = ("_profiler", "_name", "_start")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self._profiler = profiler
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._profiler._record(self._name, self._start, time.perf_counter_ns())
+        return False
+
+
+class Profiler:
+    # Per-stage wall-clock timers and named counters for the tokenizer and
+    # data pipeline. Profiling state is per process: DataLoader workers keep
+    # their own numbers.
+    def __init__(self):
+        self.enabled = False
+        self._trace = False
+        self._lock = threading.Lock()
+        self.reset()
+
+    def enable(self, trace: bool = False):
+        self.enabled = True
+        self._trace = trace
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._timers: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+            self._counters: Dict[str, int] = defaultdict(int)
+            self._events: List[Dict] = []
+
+    def stage(self, name: str):
+        if not self.enabled:
+            return _DISABLED_STAGE
+        return _Stage(self, name)
+
+    def count(self, name: str, amount: int = 1):
+        if self.enabled:
+            self._counters[name] += amount
+
+    def _record(self, name: str, start_ns: int, end_ns: int):
+        with self._lock:
+            timer = self._timers[name]
+            timer[0] += 1
+            timer[1] += end_ns - start_ns
+            if self._trace:
+                self._events.append(
+                    {
+                        "name": name,
+                        "ph": "X",
+                        "ts": start_ns / 1000,
+                        "dur": (end_ns - start_ns) / 1000,
+                        "pid": os.getpid(),
+                        "tid": threading.get_ident(),
+                    }
+                )
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "stages": {
+                    name: {
+                        "calls": calls,
+                        "total_s": total_ns / 1e9,
+                        "mean_us": total_ns / calls / 1000 if calls else 0.0,
+                    }
+                    for name, (calls, total_ns) in sorted(self._timers.items())
+                },
+                "counters": dict(sorted(self._counters.items())),
+            }
+
+    def to_json(self, path: Optional[str] = None) -> str:
+        report = json.dumps(self.to_dict(), indent=2)
+        if path is not None:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(report)
+        return report
+
+    def to_chrome_trace(self, path: str):
+        # Loadable in chrome://tracing or Perfetto; needs enable(trace=True).
+        with self._lock:
+            events = list(self._events)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+PROFILER = Profiler()
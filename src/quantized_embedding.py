@@ -0,0 +1,100 @@
+import os
+import struct
+from typing import Dict, Union
+
+import numpy as np
+import torch
+
+# Layout (little-endian): header, float32 scale per row, then the int8 table
+# row-major. Each row is quantized symmetrically: q = round(w / scale) with
+# scale = max|w| / 127, so the per-element error is at most scale / 2.
+_MAGIC = b"LLMQEMB\x00"
+_VERSION = 1
+_HEADER = struct.Struct("<8sIII12x")
+
+
+def quantize_rows(weight: torch.Tensor):
+    weight = weight.detach().float().cpu().numpy()
+    scales = np.abs(weight).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.clip(np.rint(weight / scales[:, None]), -127, 127).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+def export_quantized_embedding(weight: torch.Tensor, path: Union[str, os.PathLike]):
+    quantized, scales = quantize_rows(weight)
+    vocab_size, output_dim = quantized.shape
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, vocab_size, output_dim))
+        f.write(scales.astype("<f4").tobytes())
+        f.write(quantized.tobytes())
+
+
+class QuantizedEmbedding(torch.nn.Module):
+    # Read-only embedding backed by an mmap of an exported int8 table. Only
+    # the rows a batch looks up are read and dequantized, and every process
+    # mapping the same file shares its pages through the page cache.
+    def __init__(self, path: Union[str, os.PathLike]):
+        super().__init__()
+        with open(path, "rb") as f:
+            magic, version, vocab_size, output_dim = _HEADER.unpack(
+                f.read(_HEADER.size)
+            )
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} is not a quantized embedding table")
+
+        self.path = os.fspath(path)
+        self.num_embeddings = vocab_size
+        self.embedding_dim = output_dim
+        self._scales = None
+        self._weights = None
+
+    def __getstate__(self):
+        # Workers re-map the file instead of receiving a pickled copy.
+        state = self.__dict__.copy()
+        state["_scales"] = None
+        state["_weights"] = None
+        return state
+
+    def _open(self):
+        self._scales = np.memmap(
+            self.path,
+            dtype="<f4",
+            mode="r",
+            offset=_HEADER.size,
+            shape=(self.num_embeddings,),
+        )
+        self._weights = np.memmap(
+            self.path,
+            dtype=np.int8,
+            mode="r",
+            offset=_HEADER.size + 4 * self.num_embeddings,
+            shape=(self.num_embeddings, self.embedding_dim),
+        )
+
+    def forward(self, input_tensor: torch.Tensor) -> torch.Tensor:
+        if self._weights is None:
+            self._open()
+        ids = input_tensor.detach().cpu().numpy()
+        rows = self._weights[ids].astype(np.float32)
+        rows *= self._scales[ids][..., np.newaxis]
+        return torch.from_numpy(rows)
+
+
+def quantization_error(
+    weight: torch.Tensor, embedding: QuantizedEmbedding
+) -> Dict[str, float]:
+    reference = weight.detach().float().cpu()
+    restored = embedding(torch.arange(reference.shape[0]))
+    diff = restored - reference
+    # All-zero rows round-trip exactly but have no defined cosine.
+    nonzero = reference.abs().amax(dim=1) > 0
+    cosine = torch.nn.functional.cosine_similarity(
+        restored[nonzero], reference[nonzero], dim=1
+    )
+    return {
+        "max_abs_error": diff.abs().max().item(),
+        "mean_abs_error": diff.abs().mean().item(),
+        "relative_rms_error": (diff.norm() / reference.norm()).item(),
+        "min_row_cosine": cosine.min().item() if len(cosine) else 1.0,
+    }
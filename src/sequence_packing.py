@@ -0,0 +1,235 @@
+import bisect
+import random
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import torch
+from torch.utils.data import Dataset, Sampler
+
+from tokenizer import Tokenizer
+
+IGNORE_INDEX = -100
+
+
+def split_documents(token_ids: List[int], eot_id: int) -> List[List[int]]:
+    # Each document keeps its trailing <|endoftext|> so the model still learns
+    # to predict it.
+    documents = []
+    start = 0
+    for i, token_id in enumerate(token_ids):
+        if token_id == eot_id:
+            documents.append(token_ids[start : i + 1])
+            start = i + 1
+    if start < len(token_ids):
+        documents.append(token_ids[start:])
+    return [document for document in documents if len(document) > 1]
+
+
+def split_long_documents(
+    documents: List[List[int]], max_length: int
+) -> List[List[int]]:
+    # A piece of max_length + 1 tokens gives max_length (input, target) pairs;
+    # consecutive pieces share one token so no target is lost.
+    pieces = []
+    for document in documents:
+        for start in range(0, len(document) - 1, max_length):
+            pieces.append(document[start : start + max_length + 1])
+    return pieces
+
+
+def pack_best_fit_decreasing(lengths: Sequence[int], capacity: int) -> List[List[int]]:
+    # Items are placed longest first into the fullest bin that still has room,
+    # kept in a sorted list of (remaining capacity, bin index).
+    bins: List[List[int]] = []
+    remaining: List[Tuple[int, int]] = []
+    for item in sorted(range(len(lengths)), key=lambda i: -lengths[i]):
+        length = lengths[item]
+        slot = bisect.bisect_left(remaining, (length, -1))
+        if slot == len(remaining):
+            bins.append([item])
+            bin_index, room = len(bins) - 1, capacity - length
+        else:
+            room, bin_index = remaining.pop(slot)
+            bins[bin_index].append(item)
+            room -= length
+        if room > 0:
+            bisect.insort(remaining, (room, bin_index))
+    return bins
+
+
+class PackedGPTDataset(Dataset):
+    # Documents separated by eot_token are packed into rows of max_length
+    # positions. Each item is (input_ids, target_ids, position_ids,
+    # document_ids): positions restart at 0 for every document and
+    # document_ids (0 for padding) let the model mask attention so it never
+    # crosses a document boundary. Padded targets are IGNORE_INDEX.
+    def __init__(
+        self,
+        tokenizer: Tokenizer,
+        eot_token: str = "<|endoftext|>",
+        pad_id: int = 0,
+    ):
+        self._tokenizer = tokenizer
+        (self._eot_id,) = tokenizer.encode(eot_token)
+        self._pad_id = pad_id
+        self._input_ids = torch.empty(0, 0, dtype=torch.long)
+        self._target_ids = torch.empty(0, 0, dtype=torch.long)
+        self._position_ids = torch.empty(0, 0, dtype=torch.long)
+        self._document_ids = torch.empty(0, 0, dtype=torch.long)
+
+    def create_chunks(self, text: str, max_length: int):
+        # Rows packed from this text are added after the existing ones; all
+        # rows share one width so batches stay rectangular.
+        if len(self._input_ids) and self._input_ids.shape[1] != max_length:
+            raise ValueError(
+                f"Rows are {self._input_ids.shape[1]} wide, got max_length={max_length}"
+            )
+        documents = split_documents(self._tokenizer.encode(text), self._eot_id)
+        pieces = split_long_documents(documents, max_length)
+        bins = pack_best_fit_decreasing([len(piece) - 1 for piece in pieces], max_length)
+
+        rows = len(bins)
+        input_ids = torch.full((rows, max_length), self._pad_id, dtype=torch.long)
+        target_ids = torch.full((rows, max_length), IGNORE_INDEX, dtype=torch.long)
+        position_ids = torch.zeros((rows, max_length), dtype=torch.long)
+        document_ids = torch.zeros((rows, max_length), dtype=torch.long)
+
+        for row, items in enumerate(bins):
+            offset = 0
+            for document, item in enumerate(items, 1):
+                piece = torch.tensor(pieces[item])
+                end = offset + len(piece) - 1
+                input_ids[row, offset:end] = piece[:-1]
+                target_ids[row, offset:end] = piece[1:]
+                position_ids[row, offset:end] = torch.arange(len(piece) - 1)
+                document_ids[row, offset:end] = document
+                offset = end
+
+        if len(self._input_ids):
+            input_ids = torch.cat([self._input_ids, input_ids])
+            target_ids = torch.cat([self._target_ids, target_ids])
+            position_ids = torch.cat([self._position_ids, position_ids])
+            document_ids = torch.cat([self._document_ids, document_ids])
+        self._input_ids = input_ids
+        self._target_ids = target_ids
+        self._position_ids = position_ids
+        self._document_ids = document_ids
+
+    def token_efficiency(self) -> float:
+        if not self._document_ids.numel():
+            return 0.0
+        return (self._document_ids > 0).float().mean().item()
+
+    def __len__(self):
+        return len(self._input_ids)
+
+    def __getitem__(self, index):
+        return (
+            self._input_ids[index],
+            self._target_ids[index],
+            self._position_ids[index],
+            self._document_ids[index],
+        )
+
+
+class DocumentDataset(Dataset):
+    # One variable-length (input, target) pair per document piece, for use
+    # with LengthBucketBatchSampler and PadCollate instead of packing.
+    def __init__(self, tokenizer: Tokenizer, eot_token: str = "<|endoftext|>"):
+        self._tokenizer = tokenizer
+        (self._eot_id,) = tokenizer.encode(eot_token)
+        self._pieces: List[List[int]] = []
+
+    def create_chunks(self, text: str, max_length: int):
+        documents = split_documents(self._tokenizer.encode(text), self._eot_id)
+        self._pieces.extend(split_long_documents(documents, max_length))
+
+    def lengths(self) -> List[int]:
+        return [len(piece) - 1 for piece in self._pieces]
+
+    def __len__(self):
+        return len(self._pieces)
+
+    def __getitem__(self, index):
+        piece = torch.tensor(self._pieces[index])
+        return piece[:-1], piece[1:]
+
+
+class LengthBucketBatchSampler(Sampler):
+    # Indices are shuffled, cut into buckets of bucket_size, sorted by length
+    # inside each bucket and batched, so every batch holds similar lengths
+    # while batch order stays random.
+    def __init__(
+        self,
+        lengths: Sequence[int],
+        batch_size: int,
+        bucket_size: Optional[int] = None,
+        shuffle: bool = True,
+        drop_last: bool = False,
+        seed: int = 0,
+    ):
+        self._lengths = lengths
+        self._batch_size = batch_size
+        self._bucket_size = bucket_size or batch_size * 50
+        self._shuffle = shuffle
+        self._drop_last = drop_last
+        self._seed = seed
+        self._epoch = 0
+
+    def set_epoch(self, epoch: int):
+        self._epoch = epoch
+
+    def __iter__(self) -> Iterator[List[int]]:
+        rng = random.Random(self._seed + self._epoch)
+        indices = list(range(len(self._lengths)))
+        if self._shuffle:
+            rng.shuffle(indices)
+
+        batches = []
+        for start in range(0, len(indices), self._bucket_size):
+            bucket = sorted(
+                indices[start : start + self._bucket_size],
+                key=lambda i: self._lengths[i],
+            )
+            for batch_start in range(0, len(bucket), self._batch_size):
+                batch = bucket[batch_start : batch_start + self._batch_size]
+                if len(batch) == self._batch_size or not self._drop_last:
+                    batches.append(batch)
+
+        if self._shuffle:
+            rng.shuffle(batches)
+        return iter(batches)
+
+    def __len__(self):
+        if self._drop_last:
+            return sum(
+                min(self._bucket_size, len(self._lengths) - start) // self._batch_size
+                for start in range(0, len(self._lengths), self._bucket_size)
+            )
+        return sum(
+            -(-min(self._bucket_size, len(self._lengths) - start) // self._batch_size)
+            for start in range(0, len(self._lengths), self._bucket_size)
+        )
+
+
+class PadCollate:
+    # Pads each batch only to its longest sequence and keeps a running count
+    # of real versus padded positions.
+    def __init__(self, pad_id: int = 0):
+        self._pad_id = pad_id
+        self.real_tokens = 0
+        self.total_tokens = 0
+
+    def __call__(self, batch):
+        inputs, targets = zip(*batch)
+        padded_inputs = torch.nn.utils.rnn.pad_sequence(
+            inputs, batch_first=True, padding_value=self._pad_id
+        )
+        padded_targets = torch.nn.utils.rnn.pad_sequence(
+            targets, batch_first=True, padding_value=IGNORE_INDEX
+        )
+        self.real_tokens += sum(len(sequence) for sequence in inputs)
+        self.total_tokens += padded_inputs.numel()
+        return padded_inputs, padded_targets
+
+    def token_efficiency(self) -> float:
+        return self.real_tokens / self.total_tokens if self.total_tokens else 0.0
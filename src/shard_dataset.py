@@ -0,0 +1,67 @@
+import bisect
+import os
+from typing import List, Union
+
+import numpy as np
+import torch
+from torch.utils.data import Dataset
+
+from token_shards import open_shard, read_index
+
+
+class ShardDataset(Dataset):
+    # Serves max_length/stride windows over the concatenation of every shard,
+    # including windows that straddle a shard boundary. Shards are memory-mapped
+    # lazily in each process, so pickling the dataset into DataLoader workers
+    # only ships the index and every worker reads through the shared page cache.
+    def __init__(
+        self,
+        shard_dir: Union[str, os.PathLike],
+        max_length: int,
+        stride: int,
+    ):
+        index = read_index(shard_dir)
+        self._paths = [os.path.join(shard_dir, shard["path"]) for shard in index["shards"]]
+        self._starts: List[int] = []
+        total = 0
+        for shard in index["shards"]:
+            self._starts.append(total)
+            total += shard["num_tokens"]
+        self._total_tokens = total
+        self._max_length = max_length
+        self._stride = stride
+        self._num_windows = len(range(0, total - max_length, stride))
+        self._shards = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_shards"] = None
+        return state
+
+    def __len__(self):
+        return self._num_windows
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"Window {index} out of range for {len(self)} windows")
+
+        window = self._read(index * self._stride, self._max_length + 1)
+        return window[:-1], window[1:]
+
+    def _read(self, start: int, length: int) -> torch.Tensor:
+        if self._shards is None:
+            self._shards = [open_shard(path) for path in self._paths]
+
+        window = np.empty(length, dtype=np.int64)
+        filled = 0
+        shard = bisect.bisect_right(self._starts, start) - 1
+        offset = start - self._starts[shard]
+        while filled < length:
+            piece = self._shards[shard][offset : offset + length - filled]
+            window[filled : filled + len(piece)] = piece
+            filled += len(piece)
+            shard += 1
+            offset = 0
+        return torch.from_numpy(window)
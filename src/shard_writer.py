@@ -0,0 +1,132 @@
+import argparse
+import glob
+import os
+import time
+from multiprocessing import Pool
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from tokenization_strategy import load_strategy
+from tokenizer_artifact import load_artifact
+from token_shards import write_index, write_shard
+
+_worker_strategy = None
+
+
+def _init_worker(tokenizer_path: str):
+    global _worker_strategy
+    _worker_strategy = load_strategy(tokenizer_path)
+
+
+def _encode_file(path: str) -> Tuple[np.ndarray, int]:
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    return np.asarray(_worker_strategy.encode(text), dtype=np.int64), os.path.getsize(
+        path
+    )
+
+
+class ShardWriter:
+    def __init__(self, output_dir: str, dtype: str, shard_tokens: int):
+        os.makedirs(output_dir, exist_ok=True)
+        self._output_dir = output_dir
+        self._dtype = dtype
+        self._shard_tokens = shard_tokens
+        self._pending: List[np.ndarray] = []
+        self._pending_tokens = 0
+        self._shards = []
+
+    def add(self, tokens: np.ndarray):
+        while len(tokens):
+            room = self._shard_tokens - self._pending_tokens
+            self._pending.append(tokens[:room].astype(self._dtype))
+            self._pending_tokens += len(self._pending[-1])
+            tokens = tokens[room:]
+            if self._pending_tokens == self._shard_tokens:
+                self._flush()
+
+    def close(self):
+        if self._pending_tokens:
+            self._flush()
+        write_index(self._output_dir, self._dtype, self._shards)
+
+    def _flush(self):
+        name = f"shard_{len(self._shards):05d}.bin"
+        write_shard(os.path.join(self._output_dir, name), np.concatenate(self._pending))
+        self._shards.append({"path": name, "num_tokens": self._pending_tokens})
+        self._pending = []
+        self._pending_tokens = 0
+
+
+def write_shards(
+    files: List[str],
+    tokenizer_path: str,
+    output_dir: str,
+    num_workers: Optional[int] = None,
+    shard_tokens: int = 1 << 26,
+    separator: Optional[str] = "<|endoftext|>",
+    log_every: int = 100,
+):
+    vocab = load_artifact(tokenizer_path).vocab
+    dtype = "uint16" if max(vocab) < 2**16 else "int32"
+    inverse_vocab = {token: i for i, token in sorted(vocab.items())}
+    separator_ids = [inverse_vocab[separator]] if separator in inverse_vocab else []
+
+    writer = ShardWriter(output_dir, dtype, shard_tokens)
+    total_tokens = total_bytes = 0
+    start = time.perf_counter()
+
+    with Pool(
+        processes=num_workers, initializer=_init_worker, initargs=(tokenizer_path,)
+    ) as pool:
+        # imap keeps file order, so shards are reproducible across runs.
+        for done, (tokens, size) in enumerate(pool.imap(_encode_file, files), 1):
+            writer.add(tokens)
+            if separator_ids:
+                writer.add(np.asarray(separator_ids, dtype=np.int64))
+            total_tokens += len(tokens) + len(separator_ids)
+            total_bytes += size
+            if done % log_every == 0 or done == len(files):
+                elapsed = time.perf_counter() - start
+                print(
+                    f"{done}/{len(files)} files, {total_tokens} tokens, "
+                    f"{total_tokens / elapsed:,.0f} tokens/s, "
+                    f"{total_bytes / elapsed / 2**20:.1f} MB/s"
+                )
+
+    writer.close()
+    return total_tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Encode a directory of text files into memory-mappable token shards."
+    )
+    parser.add_argument("input_dir")
+    parser.add_argument("output_dir")
+    parser.add_argument("--tokenizer", required=True, help="Saved tokenizer artifact")
+    parser.add_argument("--pattern", default="*.txt")
+    parser.add_argument("--num-workers", type=int, default=None)
+    parser.add_argument("--shard-tokens", type=int, default=1 << 26)
+    parser.add_argument("--separator", default="<|endoftext|>")
+    args = parser.parse_args()
+
+    files = sorted(
+        glob.glob(os.path.join(args.input_dir, "**", args.pattern), recursive=True)
+    )
+    if not files:
+        parser.error(f"No files matching {args.pattern} under {args.input_dir}")
+
+    write_shards(
+        files,
+        args.tokenizer,
+        args.output_dir,
+        num_workers=args.num_workers,
+        shard_tokens=args.shard_tokens,
+        separator=args.separator or None,
+    )
+
+
+if __name__ == "__main__":
+    main()
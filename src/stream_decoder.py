@@ -0,0 +1,75 @@
+import codecs
+import re
+from typing import Callable, Iterable, Optional, Union
+
+_TRAILING_SPACE = re.compile(r"\s+\Z")
+
+
+class StreamDecoder:
+    # Turns ids arriving one at a time (or in small chunks) into text,
+    # returning only what is final so far. Work per id does not grow with
+    # the length of the stream. Call flush() once the stream ends.
+    def step(self, ids: Union[int, Iterable[int]]) -> str:
+        if isinstance(ids, int):
+            ids = (ids,)
+        return "".join([self._push(token_id) for token_id in ids])
+
+    def flush(self) -> str:
+        return ""
+
+    def _push(self, token_id: int) -> str:
+        raise NotImplementedError("Stream decoder must implement the _push method")
+
+
+class Utf8StreamDecoder(StreamDecoder):
+    # Token bytes go through an incremental utf-8 decoder, so a character
+    # whose bytes are split across tokens is held back until it completes.
+    def __init__(self, token_bytes: Callable[[int], bytes]):
+        self._token_bytes = token_bytes
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def _push(self, token_id: int) -> str:
+        return self._decoder.decode(self._token_bytes(token_id))
+
+    def flush(self) -> str:
+        return self._decoder.decode(b"", final=True)
+
+
+class JoinStreamDecoder(StreamDecoder):
+    # Streams "separator.join(tokens)". With cleanup, e.g. the Regex
+    # strategy's punctuation rule, trailing whitespace is held back until
+    # the next token shows whether the cleanup removes it.
+    def __init__(
+        self,
+        token_text: Callable[[int], str],
+        separator: str = " ",
+        cleanup: Optional["re.Pattern[str]"] = None,
+    ):
+        self._token_text = token_text
+        self._separator = separator
+        self._cleanup = cleanup
+        self._started = False
+        self._pending = ""
+
+    def _push(self, token_id: int) -> str:
+        text = self._token_text(token_id)
+        if self._started:
+            text = self._separator + text
+        self._started = True
+        if self._cleanup is None:
+            return text
+
+        # Emitted text never ends in whitespace, so a whitespace run the
+        # cleanup could match always starts inside pending + text.
+        text = self._cleanup.sub(r"\1", self._pending + text)
+        trailing = _TRAILING_SPACE.search(text)
+        if trailing is None:
+            self._pending = ""
+            return text
+        self._pending = trailing.group()
+        return text[: trailing.start()]
+
+    def flush(self) -> str:
+        pending, self._pending = self._pending, ""
+        return pending
+
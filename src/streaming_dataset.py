@@ -0,0 +1,103 @@
+import os
+import random
+import warnings
+from typing import Callable, Iterable, Iterator, List, Tuple, Union
+
+import torch
+from torch.utils.data import IterableDataset, get_worker_info
+
+from bpe_trainer import read_file_chunks
+from tokenizer import Tokenizer
+
+Source = Union[str, os.PathLike, Callable[[], Iterable[str]]]
+
+
+class StreamingGPTDataset(IterableDataset):
+    # os.PathLike paths (e.g. pathlib.Path) are read lazily in block_size
+    # pieces, plain strings are always taken as text, and callables are
+    # called in each worker for an iterable of text.
+    # Each source is one contiguous token stream: windows never cross from
+    # one source into the next. Sources are dealt round-robin to DataLoader
+    # workers, so a worker only reads its own sources; with fewer sources
+    # than workers the extra workers sit idle, and a warning says so.
+    def __init__(
+        self,
+        tokenizer: Tokenizer,
+        sources: Iterable[Source],
+        max_length: int,
+        stride: int,
+        shuffle_buffer: int = 0,
+        seed: int = 0,
+        block_size: int = 1 << 20,
+    ):
+        self._tokenizer = tokenizer
+        self._sources = list(sources)
+        self._max_length = max_length
+        self._stride = stride
+        self._shuffle_buffer = shuffle_buffer
+        self._seed = seed
+        self._block_size = block_size
+        self._epoch = 0
+
+    def set_epoch(self, epoch: int):
+        self._epoch = epoch
+
+    def __iter__(self) -> Iterator[Tuple[torch.Tensor, torch.Tensor]]:
+        worker = get_worker_info()
+        worker_id = worker.id if worker else 0
+        num_workers = worker.num_workers if worker else 1
+        if worker_id == 0 and len(self._sources) < num_workers:
+            warnings.warn(
+                f"{len(self._sources)} sources for {num_workers} DataLoader workers: "
+                f"{num_workers - len(self._sources)} workers will produce no windows. "
+                "Split the corpus into at least as many sources as workers."
+            )
+
+        windows = self._windows(worker_id, num_workers)
+        if self._shuffle_buffer > 1:
+            rng = random.Random(f"{self._seed}-{self._epoch}-{worker_id}")
+            windows = self._shuffle(windows, rng)
+        return windows
+
+    def _pieces(self, source: Source) -> Iterable[str]:
+        if callable(source):
+            return source()
+        if isinstance(source, str):
+            return [source]
+        return read_file_chunks([source], self._block_size)
+
+    def _windows(
+        self, worker_id: int, num_workers: int
+    ) -> Iterator[Tuple[torch.Tensor, torch.Tensor]]:
+        for index, source in enumerate(self._sources):
+            if index % num_workers == worker_id:
+                yield from self._source_windows(source)
+
+    def _source_windows(
+        self, source: Source
+    ) -> Iterator[Tuple[torch.Tensor, torch.Tensor]]:
+        buffer: List[int] = []
+        start = 0
+        for piece in self._pieces(source):
+            buffer.extend(self._tokenizer.encode(piece))
+            while start + self._max_length < len(buffer):
+                window = torch.tensor(buffer[start : start + self._max_length + 1])
+                yield window[:-1], window[1:]
+                start += self._stride
+
+            # Drop consumed tokens so the buffer never outgrows one piece.
+            consumed = min(start, len(buffer))
+            del buffer[:consumed]
+            start -= consumed
+
+    def _shuffle(self, items: Iterator, rng: random.Random) -> Iterator:
+        buffer = []
+        for item in items:
+            if len(buffer) < self._shuffle_buffer:
+                buffer.append(item)
+                continue
+            slot = rng.randrange(len(buffer))
+            yield buffer[slot]
+            buffer[slot] = item
+        rng.shuffle(buffer)
+        yield from buffer
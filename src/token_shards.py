@@ -0,0 +1,49 @@
+import json
+import os
+import struct
+from typing import Dict, List, Union
+
+import numpy as np
+
+# Each shard is a small header followed by num_tokens ids of a fixed dtype.
+# index.json in the same directory lists the shards in stream order.
+SHARD_MAGIC = b"LLMSHRD\x00"
+SHARD_VERSION = 1
+SHARD_HEADER = struct.Struct("<8sIIQ")
+INDEX_FILENAME = "index.json"
+DTYPES = ("uint16", "int32")
+
+
+def write_shard(path: Union[str, os.PathLike], tokens: np.ndarray):
+    header = SHARD_HEADER.pack(
+        SHARD_MAGIC, SHARD_VERSION, DTYPES.index(tokens.dtype.name), len(tokens)
+    )
+    with open(path, "wb") as f:
+        f.write(header)
+        f.write(tokens.astype(tokens.dtype.newbyteorder("<"), copy=False).tobytes())
+
+
+def open_shard(path: Union[str, os.PathLike]) -> np.memmap:
+    with open(path, "rb") as f:
+        magic, version, dtype, num_tokens = SHARD_HEADER.unpack(
+            f.read(SHARD_HEADER.size)
+        )
+    if magic != SHARD_MAGIC or version != SHARD_VERSION:
+        raise ValueError(f"{path} is not a token shard or has an unsupported version")
+    return np.memmap(
+        path,
+        dtype=np.dtype(DTYPES[dtype]).newbyteorder("<"),
+        mode="r",
+        offset=SHARD_HEADER.size,
+        shape=(num_tokens,),
+    )
+
+
+def write_index(directory: Union[str, os.PathLike], dtype: str, shards: List[Dict]):
+    with open(os.path.join(directory, INDEX_FILENAME), "w", encoding="utf-8") as f:
+        json.dump({"version": SHARD_VERSION, "dtype": dtype, "shards": shards}, f)
+
+
+def read_index(directory: Union[str, os.PathLike]) -> Dict:
+    with open(os.path.join(directory, INDEX_FILENAME), "r", encoding="utf-8") as f:
+        return json.load(f)
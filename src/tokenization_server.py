@@ -0,0 +1,346 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from tokenization_strategy import TokenizationStrategy, load_strategy
+
+# Wire protocol: one JSON object per line in each direction.
+#   request  {"id": 1, "op": "encode", "data": "some text"}
+#            {"id": 2, "op": "decode", "data": [1, 2, 3]}
+#   response {"id": 1, "result": [...]} or {"id": 1, "error": "message"}
+_OPERATIONS = {"encode": "encode_batch", "decode": "decode_batch"}
+_STREAM_LIMIT = 1 << 26
+
+_worker_strategy = None
+
+
+def _install_strategy(tokenizer_path: str):
+    global _worker_strategy
+    _worker_strategy = load_strategy(tokenizer_path)
+
+
+def _run_batch(op: str, items: List[Any]) -> List[Any]:
+    return getattr(_worker_strategy, _OPERATIONS[op])(items)
+
+
+class MicroBatcher:
+    # Requests are queued and flushed as one batch per operation once
+    # max_batch requests are waiting or the oldest has waited max_latency_ms.
+    # Batches run in the executor so the event loop keeps accepting requests.
+    def __init__(
+        self,
+        run_batch,
+        max_batch: int = 64,
+        max_latency_ms: float = 2.0,
+    ):
+        self._run_batch = run_batch
+        self._max_batch = max_batch
+        self._max_latency = max_latency_ms / 1000
+        self._queue: "asyncio.Queue[Tuple[str, Any, asyncio.Future]]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._dispatches = set()
+        self.batches = 0
+        self.requests = 0
+
+    def start(self):
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def submit(self, op: str, data: Any) -> Any:
+        if op not in _OPERATIONS:
+            raise ValueError(f"Unknown operation {op!r}")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((op, data, future))
+        return await future
+
+    async def _loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            deadline = loop.time() + self._max_latency
+            while len(pending) < self._max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            for op in _OPERATIONS:
+                group = [item for item in pending if item[0] == op]
+                if group:
+                    task = asyncio.create_task(self._dispatch(op, group))
+                    self._dispatches.add(task)
+                    task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, op: str, group: List[Tuple[str, Any, asyncio.Future]]):
+        try:
+            results = await self._run_batch(op, [data for _, data, _ in group])
+        except Exception as e:
+            if len(group) == 1:
+                _, _, future = group[0]
+                if not future.done():
+                    future.set_exception(e)
+                return
+            # Retry one by one so a bad request only fails itself.
+            await asyncio.gather(*(self._dispatch(op, [item]) for item in group))
+            return
+        # Counted only once a batch has run, so retries are not counted twice.
+        self.batches += 1
+        self.requests += len(group)
+        for (_, _, future), result in zip(group, results):
+            if not future.done():
+                future.set_result(result)
+
+
+class TokenizationServer:
+    def __init__(
+        self,
+        tokenizer_path: str,
+        max_batch: int = 64,
+        max_latency_ms: float = 2.0,
+        num_workers: Optional[int] = None,
+    ):
+        # num_workers=0 runs batches on a thread of this process instead of
+        # a process pool.
+        self._tokenizer_path = tokenizer_path
+        self._num_workers = num_workers
+        self._executor = None
+        self._strategy: Optional[TokenizationStrategy] = None
+        self._batcher = MicroBatcher(self._run_batch, max_batch, max_latency_ms)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    async def start(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        unix_path: Optional[str] = None,
+    ):
+        if self._num_workers == 0:
+            self._strategy = load_strategy(self._tokenizer_path)
+        else:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._num_workers,
+                initializer=_install_strategy,
+                initargs=(self._tokenizer_path,),
+            )
+        self._batcher.start()
+
+        if unix_path is not None:
+            self._server = await asyncio.start_unix_server(
+                self._handle, path=unix_path, limit=_STREAM_LIMIT
+            )
+        else:
+            self._server = await asyncio.start_server(
+                self._handle, host, port, limit=_STREAM_LIMIT
+            )
+
+    @property
+    def address(self):
+        return self._server.sockets[0].getsockname()
+
+    def stats(self) -> Dict[str, float]:
+        batches = self._batcher.batches
+        return {
+            "batches": batches,
+            "requests": self._batcher.requests,
+            "mean_batch_size": self._batcher.requests / batches if batches else 0.0,
+        }
+
+    async def serve_forever(self):
+        # The server is already accepting connections. Server.serve_forever
+        # is not used because on cancellation it waits for every client to
+        # disconnect, so shutdown is left to close().
+        await asyncio.get_running_loop().create_future()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+        # Connections are closed first: since Python 3.12 wait_closed() also
+        # waits for them, and would hang while a client stays connected.
+        for writer in self._connections.values():
+            writer.close()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+        await self._batcher.stop()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+    async def _run_batch(self, op: str, items: List[Any]) -> List[Any]:
+        loop = asyncio.get_running_loop()
+        if self._executor is None:
+            method = getattr(self._strategy, _OPERATIONS[op])
+            return await loop.run_in_executor(None, method, items)
+        return await loop.run_in_executor(self._executor, _run_batch, op, items)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        handler = asyncio.current_task()
+        self._connections[handler] = writer
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(self._respond(line, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            del self._connections[handler]
+            writer.close()
+
+    async def _respond(self, line: bytes, writer: asyncio.StreamWriter, lock):
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            response = {
+                "id": request_id,
+                "result": await self._batcher.submit(request["op"], request["data"]),
+            }
+        except Exception as e:
+            response = {"id": request_id, "error": f"{type(e).__name__}: {e}"}
+
+        async with lock:
+            writer.write(json.dumps(response).encode("utf-8") + b"\n")
+            await writer.drain()
+
+
+class _Connection:
+    # One socket with any number of requests in flight, matched to their
+    # responses by id.
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._lock = asyncio.Lock()
+        self._reader_task = asyncio.create_task(self._read_responses())
+
+    async def request(self, request_id: int, op: str, data: Any) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        payload = {"id": request_id, "op": op, "data": data}
+        async with self._lock:
+            self._writer.write(json.dumps(payload).encode("utf-8") + b"\n")
+            await self._writer.drain()
+        return await future
+
+    async def close(self):
+        self._writer.close()
+        self._reader_task.cancel()
+        await asyncio.gather(self._reader_task, return_exceptions=True)
+
+    async def _read_responses(self):
+        try:
+            while line := await self._reader.readline():
+                response = json.loads(line)
+                future = self._pending.pop(response["id"], None)
+                if future is None or future.done():
+                    continue
+                if "error" in response:
+                    future.set_exception(RuntimeError(response["error"]))
+                else:
+                    future.set_result(response["result"])
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Connection closed"))
+            self._pending.clear()
+
+
+class TokenizationClient:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: Optional[int] = None,
+        unix_path: Optional[str] = None,
+        pool_size: int = 4,
+    ):
+        self._host = host
+        self._port = port
+        self._unix_path = unix_path
+        self._pool_size = pool_size
+        self._connections: List[_Connection] = []
+        self._ids = itertools.count()
+
+    async def connect(self):
+        for _ in range(self._pool_size):
+            if self._unix_path is not None:
+                reader, writer = await asyncio.open_unix_connection(
+                    self._unix_path, limit=_STREAM_LIMIT
+                )
+            else:
+                reader, writer = await asyncio.open_connection(
+                    self._host, self._port, limit=_STREAM_LIMIT
+                )
+            self._connections.append(_Connection(reader, writer))
+        return self
+
+    async def close(self):
+        await asyncio.gather(*(connection.close() for connection in self._connections))
+        self._connections = []
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def encode(self, text: str) -> List[int]:
+        return await self._request("encode", text)
+
+    async def decode(self, ids: List[int]) -> str:
+        return await self._request("decode", ids)
+
+    async def _request(self, op: str, data: Any) -> Any:
+        request_id = next(self._ids)
+        connection = self._connections[request_id % len(self._connections)]
+        return await connection.request(request_id, op, data)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve encode/decode requests for a saved tokenizer."
+    )
+    parser.add_argument("--tokenizer", required=True, help="Saved tokenizer artifact")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="Serve on a Unix socket instead")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-latency-ms", type=float, default=2.0)
+    parser.add_argument("--num-workers", type=int, default=None)
+    args = parser.parse_args()
+
+    async def serve():
+        server = TokenizationServer(
+            args.tokenizer,
+            max_batch=args.max_batch,
+            max_latency_ms=args.max_latency_ms,
+            num_workers=args.num_workers,
+        )
+        if args.unix and os.path.exists(args.unix):
+            os.unlink(args.unix)
+        await server.start(args.host, args.port, unix_path=args.unix)
+        print(f"Serving {args.tokenizer} on {args.unix or server.address}")
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,58 @@
 from abc import ABC
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Set, Tuple, Union
 
+import hashlib
+import os
 import re
 
-from utils import get_freq_pair, update_pair
+from bpe_trainer import IncrementalBPETrainer, WordBPETrainer, count_words_parallel
+from compact_tables import CompactMerges, CompactVocab
+from profiling import PROFILER
+from stream_decoder import JoinStreamDecoder, StreamDecoder, Utf8StreamDecoder
+from pretokenizer import (
+    REGEX_TOKEN_PATTERN,
+    WHITESPACE_TOKEN_PATTERN,
+    PreTokenizer,
+    special_tokens_in,
+)
+from tokenizer_artifact import load_artifact, read_artifact_kind, save_artifact
+from utils import get_freq_pair, merge_by_rank, update_pair
+from word_cache import WordCache
+
+
+_PUNCTUATION_SPACE = re.compile(r'\s+([,.?!"()\'])')
+
+
+def _build_decode_table(vocab: Dict[int, str], **kwargs):
+    # numpy is only needed once a strategy decodes arrays.
+    from decode_table import DecodeTable
+
+    return DecodeTable(vocab, **kwargs)
+
+
+def _load_vocab(path: Union[str, os.PathLike], kind: str) -> Dict[str, int]:
+    artifact = load_artifact(path)
+    if artifact.kind != kind:
+        raise ValueError(f"Expected a {kind} artifact, got {artifact.kind}")
+    return {token: i for i, token in artifact.vocab.items()}
+
+
+def _fingerprint(
+    kind: str,
+    pattern: str,
+    vocab: Mapping[int, str],
+    merges: Optional[Mapping[Tuple[int, int], int]] = None,
+) -> str:
+    # Everything that decides the ids a text encodes to, hashed into one
+    # stable hex digest.
+    digest = hashlib.sha256(f"{kind}\0{pattern}\0".encode("utf-8"))
+    for i in sorted(vocab):
+        token = vocab[i].encode("utf-8")
+        digest.update(f"{i}:{len(token)}:".encode("ascii"))
+        digest.update(token)
+    for (p0, p1), new_id in (merges or {}).items():
+        digest.update(f"{p0},{p1},{new_id};".encode("ascii"))
+    return digest.hexdigest()
 
 
 class TokenizationStrategy(ABC):
@@ -15,189 +64,400 @@ class TokenizationStrategy(ABC):
     def decode(self, ids: List[int]) -> str:
         raise NotImplementedError("Tokenization strategy must implement decode method")
 
+    def fingerprint(self) -> str:
+        raise NotImplementedError(
+            "Tokenization strategy must implement the fingerprint method"
+        )
+
+    def stream_decoder(self) -> StreamDecoder:
+        raise NotImplementedError(
+            "Tokenization strategy must implement the stream_decoder method"
+        )
+
+    def encode_batch(self, texts: Iterable[str]) -> List[List[int]]:
+        return [self.encode(text) for text in texts]
+
+    def decode_batch(self, batch: Iterable[List[int]]) -> List[str]:
+        return [self.decode(ids) for ids in batch]
+
+    def decode_array(self, ids) -> Union[str, List[str]]:
+        # ids is a 1-D or 2-D torch.Tensor/NumPy array; 2-D gives one string
+        # per row.
+        if hasattr(ids, "detach"):
+            ids = ids.detach().cpu()
+        if len(ids.shape) == 1:
+            return self.decode(ids.tolist())
+        return self.decode_batch(ids.tolist())
+
 
 class WhitespaceTokenizationStrategy(TokenizationStrategy):
     def __init__(self, vocab: Dict[str, int]):
         self._str_to_int = vocab
         self._int_to_str = {i: s for s, i in vocab.items()}
+        self._decode_table = None
+        self._fingerprint = None
 
     def encode(self, text: str) -> List[int]:
-        return [
-            self._str_to_int.get(token, self._str_to_int.get("<|unk|>"))
-            for token in text.split()
-        ]
+        with PROFILER.stage("whitespace.encode"):
+            return [
+                self._str_to_int.get(token, self._str_to_int.get("<|unk|>"))
+                for token in text.split()
+            ]
 
     def decode(self, ids: List[int]) -> str:
         return " ".join(self._int_to_str.get(i, "<|unk|>") for i in ids)
 
+    def stream_decoder(self) -> StreamDecoder:
+        return JoinStreamDecoder(self._token_text)
+
+    def _token_text(self, token_id: int) -> str:
+        return self._int_to_str.get(token_id, "<|unk|>")
+
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            self._fingerprint = _fingerprint(
+                "whitespace", WHITESPACE_TOKEN_PATTERN, self._int_to_str
+            )
+        return self._fingerprint
+
+    def decode_array(self, ids) -> Union[str, List[str]]:
+        if self._decode_table is None:
+            self._decode_table = _build_decode_table(
+                self._int_to_str, separator=" ", unknown="<|unk|>"
+            )
+        return self._decode_table.decode(ids)
+
+    def save(self, path: Union[str, os.PathLike]):
+        save_artifact(path, "whitespace", self._int_to_str)
+
+    @classmethod
+    def load(cls, path: Union[str, os.PathLike]) -> "WhitespaceTokenizationStrategy":
+        return cls(_load_vocab(path, "whitespace"))
+
 
 class RegexTokenizationStrategy(TokenizationStrategy):
     def __init__(self, vocab: dict):
         self._str_to_int = vocab
         self._int_to_str = {i: s for s, i in vocab.items()}
+        self._decode_table = None
+        self._fingerprint = None
+        self._pretokenizer = PreTokenizer(special_tokens_in(vocab), REGEX_TOKEN_PATTERN)
 
     def encode(self, text: str) -> List[int]:
-        preprocessed = re.split(r'([,.:;?_!"()\']|--|\s)', text)
-
-        preprocessed = [item.strip() for item in preprocessed if item.strip()]
-        ids = [
-            self._str_to_int.get(item, self._str_to_int.get("<|unk|>"))
-            for item in preprocessed
-        ]
+        unk_id = self._str_to_int.get("<|unk|>")
+        spans = self._pretokenizer.spans(text)
+        if PROFILER.enabled:
+            # Materialized only when profiling, to time the two passes apart.
+            with PROFILER.stage("regex.pretokenize"):
+                spans = list(spans)
+            PROFILER.count("regex.words_seen", len(spans))
+        with PROFILER.stage("regex.lookup"):
+            ids = [
+                self._str_to_int.get(text[start:end], unk_id)
+                for start, end, _ in spans
+            ]
         return ids
 
     def decode(self, ids: List) -> str:
         text = " ".join(self._int_to_str.get(i, "<|unk|>") for i in ids)
-        text = re.sub(r'\s+([,.?!"()\'])', r"\1", text)
+        text = _PUNCTUATION_SPACE.sub(r"\1", text)
         return text
 
+    def stream_decoder(self) -> StreamDecoder:
+        return JoinStreamDecoder(self._token_text, cleanup=_PUNCTUATION_SPACE)
+
+    def _token_text(self, token_id: int) -> str:
+        return self._int_to_str.get(token_id, "<|unk|>")
+
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            self._fingerprint = _fingerprint(
+                "regex", REGEX_TOKEN_PATTERN, self._int_to_str
+            )
+        return self._fingerprint
+
+    def decode_array(self, ids) -> Union[str, List[str]]:
+        if self._decode_table is None:
+            self._decode_table = _build_decode_table(
+                self._int_to_str, separator=" ", unknown="<|unk|>"
+            )
+        decoded = self._decode_table.decode(ids)
+        if isinstance(decoded, str):
+            return _PUNCTUATION_SPACE.sub(r"\1", decoded)
+        return [_PUNCTUATION_SPACE.sub(r"\1", text) for text in decoded]
+
+    def save(self, path: Union[str, os.PathLike]):
+        save_artifact(path, "regex", self._int_to_str)
+
+    @classmethod
+    def load(cls, path: Union[str, os.PathLike]) -> "RegexTokenizationStrategy":
+        return cls(_load_vocab(path, "regex"))
+
+
+class _BPELookups(NamedTuple):
+    vocab: Dict[int, str]
+    inverse_vocab: Dict[str, int]
+    ranks: Dict[Tuple[int, int], int]
+    merges: Dict[Tuple[int, int], int]
+
 
 class BPETokenizationStrategy(TokenizationStrategy):
-    def __init__(self):
+    # Trained tables are stored as CompactVocab/CompactMerges, which pickle
+    # as a few flat buffers. encode/decode build plain dict lookups from them
+    # on first use in each process: workers that never tokenize (e.g. behind
+    # a GPTDataset) only carry the buffers, while a process that tokenizes
+    # holds the dicts as before plus the buffers.
+    def __init__(
+        self,
+        cache_max_entries: Optional[int] = None,
+        cache_max_bytes: Optional[int] = None,
+    ):
         self._vocab = {}
-        self._inverse_vocab = {}
         self._bpe_merges = {}
-        self._bpe_ranks = {}
+        self._lookups: Optional[_BPELookups] = None
+        self._fingerprint = None
+        self._decode_table = None
+        self._pretokenizer = None
+        self._word_cache = None
+        if cache_max_entries is not None or cache_max_bytes is not None:
+            self._word_cache = WordCache(cache_max_entries, cache_max_bytes)
 
     def train(
         self,
         text: str,
         vocab_size: int,
         allowed_special={"<|endoftext|>", "<|unk|>"},
+        engine: str = "incremental",
     ):
         assert text
         assert vocab_size > len(allowed_special)
 
+        inverse_vocab = self._init_vocab(set(text), allowed_special)
+        token_ids = [inverse_vocab[char] for char in text if char in inverse_vocab]
+
+        engines = {
+            "naive": self._train_naive,
+            "incremental": self._train_incremental,
+        }
+        self._bpe_merges = engines[engine](token_ids, len(self._vocab), vocab_size)
+        self._add_merged_tokens()
+
+    def train_from_iterator(
+        self,
+        texts: Iterable[str],
+        vocab_size: int,
+        allowed_special={"<|endoftext|>", "<|unk|>"},
+        num_workers: Optional[int] = None,
+        chunk_size: int = 1 << 20,
+        files: Iterable[Union[str, os.PathLike]] = (),
+    ):
+        # texts are text chunks; files are streamed from disk in chunk_size
+        # pieces. num_workers=0 counts in this process.
+        assert vocab_size > len(allowed_special)
+
+        word_counts = count_words_parallel(texts, files, num_workers, chunk_size)
+        assert word_counts
+
+        chars = set()
+        for word in word_counts:
+            chars.update(word)
+        inverse_vocab = self._init_vocab(chars, allowed_special)
+
+        word_ids = {
+            tuple(inverse_vocab[char] for char in word): count
+            for word, count in word_counts.items()
+        }
+        self._bpe_merges = WordBPETrainer(word_ids).train(len(self._vocab), vocab_size)
+        self._add_merged_tokens()
+
+    def _init_vocab(self, chars: Set[str], allowed_special: Set[str]) -> Dict[str, int]:
         unique_chars = [chr(i) for i in range(256)]
-        unique_chars.extend(sorted(set(text)))
+        unique_chars.extend(sorted(chars))
 
         self._vocab = {i: char for i, char in enumerate(unique_chars)}
-        self._inverse_vocab = {char: i for i, char in enumerate(unique_chars)}
+        inverse_vocab = {char: i for i, char in enumerate(unique_chars)}
 
-        for token in allowed_special:
-            if token not in self._inverse_vocab:
+        # Sorted so special-token ids do not depend on the string hash seed.
+        for token in sorted(allowed_special):
+            if token not in inverse_vocab:
                 new_id = len(self._vocab)
                 self._vocab[new_id] = token
-                self._inverse_vocab[token] = new_id
-        token_ids = [
-            self._inverse_vocab[char] for char in text if char in self._inverse_vocab
-        ]
+                inverse_vocab[token] = new_id
+        return inverse_vocab
+
+    def _add_merged_tokens(self):
+        self._decode_table = None
+        self._pretokenizer = None
+        # Cached merges from the previous training run are no longer valid.
+        if self._word_cache is not None:
+            self._word_cache.clear()
+        for (p0, p1), new_id in self._bpe_merges.items():
+            self._vocab[new_id] = self._vocab[p0] + self._vocab[p1]
+        self._set_tables(self._vocab, self._bpe_merges)
 
-        for new_id in range(len(self._vocab), vocab_size):
+    def _set_tables(
+        self,
+        vocab: Dict[int, str],
+        merges: Dict[Tuple[int, int], int],
+    ):
+        self._vocab = CompactVocab(vocab)
+        self._bpe_merges = CompactMerges(merges)
+        self._lookups = None
+        self._fingerprint = None
+
+    def _get_lookups(self) -> _BPELookups:
+        if self._lookups is None:
+            # Ids ascend, so later ones win when two ids share a token.
+            self._lookups = _BPELookups(
+                vocab=dict(self._vocab.items()),
+                inverse_vocab={token: i for i, token in self._vocab.items()},
+                ranks={pair: rank for rank, pair in enumerate(self._bpe_merges)},
+                merges=dict(self._bpe_merges.items()),
+            )
+        return self._lookups
+
+    def __getstate__(self):
+        # Lookups, the pre-tokenizer and the decode table are rebuilt on
+        # first use rather than pickled into every worker.
+        state = self.__dict__.copy()
+        state["_lookups"] = None
+        state["_decode_table"] = None
+        state["_pretokenizer"] = None
+        return state
+
+    def _train_naive(
+        self,
+        token_ids: List[int],
+        first_id: int,
+        vocab_size: int,
+    ) -> Dict[Tuple[int, int], int]:
+        merges = {}
+        for new_id in range(first_id, vocab_size):
             try:
                 pair_id = get_freq_pair(token_ids, mode="most")
                 if not pair_id:
                     break
 
                 token_ids = update_pair(token_ids, pair_id, new_id)
-                self._bpe_merges[pair_id] = new_id
+                merges[pair_id] = new_id
             except Exception as e:
                 print(f"Error during BPE training: {e}")
                 break
+        return merges
 
-        for (p0, p1), new_id in self._bpe_merges.items():
-            merged_token = self._vocab[p0] + self._vocab[p1]
-            self._vocab[new_id] = merged_token
-            self._inverse_vocab[merged_token] = new_id
+    def _train_incremental(
+        self,
+        token_ids: List[int],
+        first_id: int,
+        vocab_size: int,
+    ) -> Dict[Tuple[int, int], int]:
+        return IncrementalBPETrainer(token_ids).train(first_id, vocab_size)
 
     def get_vocab(self) -> Dict:
         return self._vocab
 
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            self._fingerprint = _fingerprint(
+                "bpe", WHITESPACE_TOKEN_PATTERN, self._vocab, self._bpe_merges
+            )
+        return self._fingerprint
+
+    def save(self, path: Union[str, os.PathLike]):
+        save_artifact(path, "bpe", self._vocab, dict(self._bpe_merges.items()))
+
+    @classmethod
+    def load(
+        cls,
+        path: Union[str, os.PathLike],
+        cache_max_entries: Optional[int] = None,
+        cache_max_bytes: Optional[int] = None,
+    ) -> "BPETokenizationStrategy":
+        artifact = load_artifact(path)
+        if artifact.kind != "bpe":
+            raise ValueError(f"Expected a bpe artifact, got {artifact.kind}")
+
+        strategy = cls(cache_max_entries, cache_max_bytes)
+        strategy._set_tables(artifact.vocab, artifact.merges)
+        return strategy
+
+    def cache_stats(self) -> Optional[Dict[str, int]]:
+        if self._word_cache is None:
+            return None
+        return self._word_cache.stats()
+
     def encode(self, text: str) -> List[int]:
-        tokens = text.split()
+        inverse_vocab = self._get_lookups().inverse_vocab
+        if self._pretokenizer is None:
+            self._pretokenizer = PreTokenizer(special_tokens_in(inverse_vocab))
         token_ids = []
 
-        for token in tokens:
-            if token in self._inverse_vocab:
-                token_ids.append(self._inverse_vocab[token])
-            else:
-                sub_token_ids = self._tokenize_with_bpe(token)
-                token_ids.extend(sub_token_ids)
+        spans = self._pretokenizer.spans(text)
+        if PROFILER.enabled:
+            # Materialized only when profiling, to time the two passes apart.
+            with PROFILER.stage("bpe.pretokenize"):
+                spans = list(spans)
+            PROFILER.count("bpe.words_seen", len(spans))
+            if self._word_cache is not None:
+                hits, misses = self._word_cache.hits, self._word_cache.misses
+
+        with PROFILER.stage("bpe.lookup_and_merge"):
+            for start, end, _ in spans:
+                token = text[start:end]
+                if token in inverse_vocab:
+                    token_ids.append(inverse_vocab[token])
+                elif self._word_cache is not None:
+                    sub_token_ids = self._word_cache.get(token)
+                    if sub_token_ids is None:
+                        sub_token_ids = tuple(self._tokenize_with_bpe(token))
+                        self._word_cache.put(token, sub_token_ids)
+                    token_ids.extend(sub_token_ids)
+                else:
+                    sub_token_ids = self._tokenize_with_bpe(token)
+                    token_ids.extend(sub_token_ids)
 
+        if PROFILER.enabled and self._word_cache is not None:
+            PROFILER.count("bpe.cache_hits", self._word_cache.hits - hits)
+            PROFILER.count("bpe.cache_misses", self._word_cache.misses - misses)
         return token_ids
 
     def decode(self, ids: List[int]) -> str:
-        return "".join([self._vocab[id] for id in ids])
+        vocab = self._get_lookups().vocab
+        return "".join([vocab[id] for id in ids])
+
+    def decode_array(self, ids) -> Union[str, List[str]]:
+        if self._decode_table is None:
+            self._decode_table = _build_decode_table(self._vocab)
+        return self._decode_table.decode(ids)
+
+    def stream_decoder(self) -> StreamDecoder:
+        # Token bytes come straight from the compact vocab's blob.
+        vocab = self._vocab
+        if not isinstance(vocab, CompactVocab):
+            vocab = CompactVocab(vocab)
+        return Utf8StreamDecoder(vocab.token_bytes)
 
     def _tokenize_with_bpe(self, token: str) -> List[int]:
         token_ids = self._get_token_ids(token)
-        if not self._bpe_ranks:
-            return self._merge_tokens(token_ids)
+        lookups = self._get_lookups()
+        if not PROFILER.enabled:
+            return merge_by_rank(token_ids, lookups.ranks, lookups.merges)
 
-        return self._merge_symbols(token_ids)
+        with PROFILER.stage("bpe.merge"):
+            merged = merge_by_rank(token_ids, lookups.ranks, lookups.merges)
+        PROFILER.count("bpe.merges_applied", len(token_ids) - len(merged))
+        return merged
 
     def _get_token_ids(self, token: str) -> List[int]:
-        return [self._inverse_vocab.get(char, "<|unk|>") for char in token]
-
-    def _merge_symbols(self, token_ids: List[int]) -> List[int]:
-        symbols = [self._vocab[id_num] for id_num in token_ids]
-
-        while True:
-            pairs = set(zip(symbols, symbols[1:]))
-            if not pairs:
-                break
-
-            bigram = self._get_most_frequent_bigram(pairs)
-            if bigram is None:
-                break
-
-            symbols = self._merge_bigram(symbols, bigram)
-            if len(symbols) == 1:
-                break
-        return [self._inverse_vocab[sym] for sym in symbols]
-
-    def _merge_tokens(self, token_ids: List[int]) -> List[int]:
-        can_merge = True
-        while can_merge and len(token_ids) > 1:
-            can_merge = False
-            new_tokens = []
-            i = 0
-            while i < len(token_ids) - 1:
-                pair = (token_ids[i], token_ids[i + 1])
-                if pair in self._bpe_merges:
-                    merged_token_id = self._bpe_merges[pair]
-                    new_tokens.append(merged_token_id)
-                    i += 2
-                    can_merge = True
-                else:
-                    new_tokens.append(token_ids[i])
-                    i += 1
-            if i < len(token_ids):
-                new_tokens.append(token_ids[i])
-            token_ids = new_tokens
-        return token_ids
-
-    def _get_most_frequent_bigram(
-        self,
-        pairs: set,
-    ) -> Optional[Tuple[str, str]]:
-        min_rank = float("inf")
-        bigram = None
-        for p in pairs:
-            current_rank = self._bpe_ranks.get(p, float("inf"))
-            if current_rank < min_rank:
-                min_rank = current_rank
-                bigram = p
-        return bigram
-
-    def _merge_bigram(
-        self,
-        symbols: List[str],
-        bigram: Tuple[str, str],
-    ) -> List[str]:
-        first, second = bigram
-        new_symbols = []
-        i = 0
-
-        while i < len(symbols):
-            if (
-                i < len(symbols) - 1
-                and symbols[i] == first
-                and symbols[i + 1] == second
-            ):
-                new_symbols.append(first + second)
-                i += 2
-            else:
-                new_symbols.append(symbols[i])
-                i += 1
-        return new_symbols
+        inverse_vocab = self._get_lookups().inverse_vocab
+        unk_id = inverse_vocab.get("<|unk|>")
+        return [inverse_vocab.get(char, unk_id) for char in token]
+
+
+def load_strategy(path: Union[str, os.PathLike]) -> TokenizationStrategy:
+    strategies = {
+        "whitespace": WhitespaceTokenizationStrategy,
+        "regex": RegexTokenizationStrategy,
+        "bpe": BPETokenizationStrategy,
+    }
+    return strategies[read_artifact_kind(path)].load(path)
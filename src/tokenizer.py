@@ -1,4 +1,9 @@
-from typing import List
+from typing import Iterable, List, Optional, Union
+
+from batch_executor import ExecutionBackend, get_backend
+from encode_cache import EncodeCache
+from profiling import PROFILER
+from stream_decoder import StreamDecoder
 from tokenization_strategy import TokenizationStrategy
 
 
@@ -6,17 +11,70 @@ class Tokenizer:
     def __init__(
         self,
         strategy: TokenizationStrategy,
+        encode_cache: Optional[EncodeCache] = None,
     ):
         self.strategy = strategy
+        self.encode_cache = encode_cache
 
     def encode(
         self,
         text: str,
     ) -> List[int]:
-        return self.strategy.encode(text)
+        if PROFILER.enabled:
+            PROFILER.count("tokenizer.bytes_processed", len(text.encode("utf-8")))
+        with PROFILER.stage("tokenizer.encode"):
+            if self.encode_cache is not None:
+                return self.encode_cache.encode(self.strategy, text)
+            return self.strategy.encode(text)
 
     def decode(
         self,
         ids: List[int],
     ) -> str:
-        return self.strategy.decode(ids)
+        with PROFILER.stage("tokenizer.decode"):
+            return self.strategy.decode(ids)
+
+    def decode_array(self, ids) -> Union[str, List[str]]:
+        return self.strategy.decode_array(ids)
+
+    def stream_decoder(self) -> StreamDecoder:
+        return self.strategy.stream_decoder()
+
+    def encode_batch(
+        self,
+        texts: Iterable[str],
+        backend: Union[str, ExecutionBackend] = "serial",
+        num_workers: Optional[int] = None,
+        chunk_size: int = 64,
+    ) -> List[List[int]]:
+        with PROFILER.stage("tokenizer.encode_batch"):
+            executor = self._resolve_backend(backend, num_workers, chunk_size)
+            if self.encode_cache is None:
+                return executor.run(self.strategy, "encode_batch", texts)
+            return self.encode_cache.encode_documents(
+                self.strategy,
+                texts,
+                lambda missing: executor.run(self.strategy, "encode_batch", missing),
+            )
+
+    def decode_batch(
+        self,
+        batch: Iterable[List[int]],
+        backend: Union[str, ExecutionBackend] = "serial",
+        num_workers: Optional[int] = None,
+        chunk_size: int = 64,
+    ) -> List[str]:
+        with PROFILER.stage("tokenizer.decode_batch"):
+            return self._resolve_backend(backend, num_workers, chunk_size).run(
+                self.strategy, "decode_batch", batch
+            )
+
+    def _resolve_backend(
+        self,
+        backend: Union[str, ExecutionBackend],
+        num_workers: Optional[int],
+        chunk_size: int,
+    ) -> ExecutionBackend:
+        if isinstance(backend, ExecutionBackend):
+            return backend
+        return get_backend(backend, num_workers=num_workers, chunk_size=chunk_size)
@@ -0,0 +1,124 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, NamedTuple, Optional, Tuple, Union
+
+# Layout (little-endian):
+#   header  magic, version, kind, vocab count, merge count, first merge id,
+#           blob length
+#   ids     int32[vocab count]
+#   offsets uint32[vocab count + 1]   byte offsets of each token in the blob
+#   merges  int32[merge count * 2]    (left, right) pairs in rank order
+#   blob    utf-8 bytes of every token, concatenated
+_MAGIC = b"LLMTOK\x00\x01"
+_VERSION = 1
+_HEADER = struct.Struct("<8sIIIIiQ")
+_KINDS = ("whitespace", "regex", "bpe")
+
+
+class TokenizerArtifact(NamedTuple):
+    kind: str
+    vocab: Dict[int, str]
+    merges: Dict[Tuple[int, int], int]
+
+
+def save_artifact(
+    path: Union[str, os.PathLike],
+    kind: str,
+    vocab: Dict[int, str],
+    merges: Optional[Dict[Tuple[int, int], int]] = None,
+):
+    merges = merges or {}
+    ids = array("i", vocab.keys())
+    offsets = array("I", [0])
+    blob = bytearray()
+    for token in vocab.values():
+        blob += token.encode("utf-8")
+        offsets.append(len(blob))
+
+    first_merge_id = next(iter(merges.values()), 0)
+    pairs = array("i")
+    for rank, (pair, new_id) in enumerate(merges.items()):
+        # Merge ids are assigned consecutively, so only the first is stored.
+        if new_id != first_merge_id + rank:
+            raise ValueError("Merge ids must be consecutive in rank order")
+        pairs.extend(pair)
+
+    header = _HEADER.pack(
+        _MAGIC,
+        _VERSION,
+        _KINDS.index(kind),
+        len(ids),
+        len(merges),
+        first_merge_id,
+        len(blob),
+    )
+    for section in (ids, offsets, pairs):
+        if section.itemsize != 4:
+            raise RuntimeError("Artifact arrays must use 4-byte items")
+        if sys.byteorder != "little":
+            section.byteswap()
+
+    with open(path, "wb") as f:
+        f.write(header)
+        f.write(ids.tobytes())
+        f.write(offsets.tobytes())
+        f.write(pairs.tobytes())
+        f.write(blob)
+
+
+def load_artifact(path: Union[str, os.PathLike]) -> TokenizerArtifact:
+    with open(path, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mapped:
+        view = memoryview(mapped)
+        try:
+            return _parse(view)
+        finally:
+            view.release()
+
+
+def read_artifact_kind(path: Union[str, os.PathLike]) -> str:
+    with open(path, "rb") as f:
+        magic, version, kind, *_ = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError("Not a tokenizer artifact or unsupported version")
+    return _KINDS[kind]
+
+
+def _parse(view: memoryview) -> TokenizerArtifact:
+    magic, version, kind, vocab_count, merge_count, first_merge_id, blob_length = (
+        _HEADER.unpack_from(view)
+    )
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError("Not a tokenizer artifact or unsupported version")
+
+    position = _HEADER.size
+    ids = _int_section(view, position, vocab_count, "i")
+    position += 4 * vocab_count
+    offsets = _int_section(view, position, vocab_count + 1, "I")
+    position += 4 * (vocab_count + 1)
+    pairs = _int_section(view, position, 2 * merge_count, "i")
+    position += 8 * merge_count
+    blob = view[position : position + blob_length]
+
+    vocab = {
+        ids[i]: str(blob[offsets[i] : offsets[i + 1]], "utf-8")
+        for i in range(vocab_count)
+    }
+    merges = {
+        (pairs[2 * rank], pairs[2 * rank + 1]): first_merge_id + rank
+        for rank in range(merge_count)
+    }
+    return TokenizerArtifact(_KINDS[kind], vocab, merges)
+
+
+def _int_section(view: memoryview, start: int, count: int, typecode: str):
+    section = view[start : start + 4 * count]
+    if sys.byteorder == "little":
+        return section.cast(typecode).tolist()
+    swapped = array(typecode, section.tobytes())
+    swapped.byteswap()
+    return swapped.tolist()
@@ -1,5 +1,6 @@
+import heapq
 from collections import deque
-from typing import Counter, List, Optional, Tuple
+from typing import Counter, Dict, List, Optional, Tuple
 
 def get_freq_pair(
     ids: List[int],
@@ -34,3 +35,54 @@ def update_pair(
             replaced.append(current)
 
     return replaced
+
+def merge_by_rank(
+    ids: List[int],
+    ranks: Dict[Tuple[int, int], int],
+    merges: Dict[Tuple[int, int], int],
+) -> List[int]:
+    size = len(ids)
+    if size < 2:
+        return list(ids)
+
+    values = list(ids)
+    removed = [False] * size
+    prev = list(range(-1, size - 1))
+    next_ = list(range(1, size + 1))
+    next_[-1] = -1
+
+    heap = []
+    for position in range(size - 1):
+        rank = ranks.get((values[position], values[position + 1]))
+        if rank is not None:
+            heap.append((rank, position))
+    heapq.heapify(heap)
+
+    while heap:
+        rank, position = heapq.heappop(heap)
+        right = next_[position]
+        # Entries go stale once either side has been merged away.
+        if removed[position] or right == -1:
+            continue
+        pair = (values[position], values[right])
+        if ranks.get(pair) != rank:
+            continue
+
+        values[position] = merges[pair]
+        removed[right] = True
+        after = next_[right]
+        next_[position] = after
+        if after != -1:
+            prev[after] = position
+
+        left = prev[position]
+        if left != -1:
+            left_rank = ranks.get((values[left], values[position]))
+            if left_rank is not None:
+                heapq.heappush(heap, (left_rank, left))
+        if after != -1:
+            right_rank = ranks.get((values[position], values[after]))
+            if right_rank is not None:
+                heapq.heappush(heap, (right_rank, position))
+
+    return [value for value, gone in zip(values, removed) if not gone]
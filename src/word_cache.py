@@ -0,0 +1,89 @@
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+class WordCache:
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        assert max_entries is None or max_entries > 0
+        assert max_bytes is None or max_bytes > 0
+
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[int, ...]]" = OrderedDict()
+        self._bytes = 0
+        # The strategy, and so its cache, is shared by thread-pool workers.
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, word: str) -> Optional[Tuple[int, ...]]:
+        with self._lock:
+            ids = self._entries.get(word)
+            if ids is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(word)
+            self.hits += 1
+            return ids
+
+    def put(self, word: str, ids: Tuple[int, ...]):
+        size = self._entry_size(word, ids)
+        with self._lock:
+            if word in self._entries:
+                self._bytes -= self._entry_size(word, self._entries.pop(word))
+
+            if self._max_bytes is not None and size > self._max_bytes:
+                return
+
+            self._entries[word] = ids
+            self._bytes += size
+            while self._over_limit():
+                evicted_word, evicted_ids = self._entries.popitem(last=False)
+                self._bytes -= self._entry_size(evicted_word, evicted_ids)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getstate__(self):
+        # A copy sent to another process starts empty with the same limits.
+        state = self.__dict__.copy()
+        state["_entries"] = OrderedDict()
+        state["_bytes"] = 0
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _over_limit(self) -> bool:
+        if self._max_entries is not None and len(self._entries) > self._max_entries:
+            return True
+        return self._max_bytes is not None and self._bytes > self._max_bytes
+
+    @staticmethod
+    def _entry_size(word: str, ids: Tuple[int, ...]) -> int:
+        return sys.getsizeof(word) + sys.getsizeof(ids)
@@ -0,0 +1,25 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# The modules under src/ import each other by bare name, as main.py does.
+sys.path.insert(0, str(ROOT / "src"))
+
+
+class IdTokenizer:
+    # Reads whitespace separated integers as ids; <|endoftext|> is id 0.
+    def encode(self, text):
+        return [0 if token == "<|endoftext|>" else int(token) for token in text.split()]
+
+
+@pytest.fixture
+def id_tokenizer():
+    return IdTokenizer()
+
+
+@pytest.fixture(scope="session")
+def verdict_text():
+    return (ROOT / "assets" / "the-verdict.txt").read_text(encoding="utf-8")
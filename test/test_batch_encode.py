@@ -0,0 +1,23 @@
+import pytest
+
+from src.tokenization_strategy import BPETokenizationStrategy
+from src.tokenizer import Tokenizer
+
+
+@pytest.mark.parametrize("backend", ["serial", "thread", "process"])
+def test_batch_round_trip_preserves_order(backend, verdict_text):
+    text = verdict_text
+    strategy = BPETokenizationStrategy()
+    strategy.train(text, vocab_size=400)
+    tokenizer = Tokenizer(strategy=strategy)
+    documents = text.splitlines()
+
+    encoded = tokenizer.encode_batch(
+        iter(documents), backend=backend, num_workers=2, chunk_size=7
+    )
+    assert encoded == [tokenizer.encode(document) for document in documents]
+
+    decoded = tokenizer.decode_batch(
+        encoded, backend=backend, num_workers=2, chunk_size=7
+    )
+    assert decoded == [tokenizer.decode(ids) for ids in encoded]
@@ -0,0 +1,43 @@
+import pickle
+
+import pytest
+
+from src.compact_tables import CompactMerges, CompactVocab
+from src.tokenization_strategy import BPETokenizationStrategy
+
+
+def test_compact_vocab_matches_dicts():
+    vocab = {0: "a", 1: "b", 2: "wörld", 5: "ab", 7: "a"}
+    compact = CompactVocab(vocab)
+
+    assert dict(compact) == vocab
+    assert compact[2] == "wörld"
+    assert compact.token_bytes(2) == "wörld".encode("utf-8")
+    assert 3 not in compact
+    with pytest.raises(KeyError):
+        compact[3]
+
+
+def test_compact_merges_keep_rank_order():
+    merges = {(1, 2): 10, (10, 3): 11, (0, 0): 12}
+    compact = CompactMerges(merges)
+
+    assert list(compact.items()) == list(merges.items())
+    assert list(compact) == list(merges)
+    assert compact == CompactMerges(dict(merges))
+    with pytest.raises(ValueError):
+        CompactMerges({(1, 2): 10, (2, 3): 12})
+
+
+def test_pickled_strategy_encodes_identically(verdict_text):
+    text = verdict_text
+    strategy = BPETokenizationStrategy(cache_max_entries=1000)
+    strategy.train(text, vocab_size=600)
+    ids = strategy.encode(text)
+
+    copy = pickle.loads(pickle.dumps(strategy))
+
+    assert copy._lookups is None
+    assert len(copy._word_cache) == 0
+    assert copy.encode(text) == ids
+    assert copy.decode(ids) == strategy.decode(ids)
@@ -0,0 +1,38 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from src.create_embedding import CreateEmbedding  # noqa: E402
+
+
+def test_fused_position_lookup_matches_separate_add():
+    embedding = CreateEmbedding(50, 8, seed=123, context_length=6)
+    inputs = torch.randint(0, 50, (3, 6))
+
+    expected = embedding.get_weight()[inputs] + embedding._position_layer.weight
+
+    assert torch.allclose(embedding.embbed(inputs), expected)
+
+
+def test_sparse_embedding_steps_with_sparse_adam():
+    embedding = CreateEmbedding(50, 8, seed=123, context_length=6, sparse=True)
+    optimizers = embedding.create_optimizers(lr=0.1)
+    before = embedding.get_weight().detach().clone()
+
+    embedding.embbed(torch.tensor([[1, 2, 3]])).sum().backward()
+    for optimizer in optimizers:
+        optimizer.step()
+
+    assert embedding.get_weight().grad.is_sparse
+    changed = (embedding.get_weight() != before).any(dim=1).nonzero().flatten()
+    assert changed.tolist() == [1, 2, 3]
+    with pytest.raises(ValueError):
+        embedding.tie_output_projection()
+
+
+def test_tied_projection_shares_the_token_table():
+    embedding = CreateEmbedding(50, 8, seed=123, dtype=torch.bfloat16)
+    projection = embedding.tie_output_projection()
+
+    assert projection.weight is embedding.get_weight()
+    assert embedding.embbed(torch.tensor([[4]])).dtype == torch.bfloat16
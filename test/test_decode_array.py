@@ -0,0 +1,36 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.tokenization_strategy import (  # noqa: E402
+    BPETokenizationStrategy,
+    RegexTokenizationStrategy,
+    WhitespaceTokenizationStrategy,
+)
+
+
+def test_bpe_decode_array_matches_decode(verdict_text):
+    text = verdict_text
+    strategy = BPETokenizationStrategy()
+    strategy.train(text, vocab_size=500)
+    ids = strategy.encode(text)[:1200]
+    batch = np.asarray(ids, dtype=np.int32).reshape(12, 100)
+
+    assert strategy.decode_array(batch) == [strategy.decode(row) for row in batch.tolist()]
+    assert strategy.decode_array(np.asarray(ids)) == strategy.decode(ids)
+
+    with pytest.raises(KeyError):
+        strategy.decode_array(np.asarray([10**6]))
+
+
+@pytest.mark.parametrize(
+    "strategy_class", [WhitespaceTokenizationStrategy, RegexTokenizationStrategy]
+)
+def test_vocab_decode_array_matches_decode(strategy_class):
+    vocab = {"<|unk|>": 0, "Hello": 1, ",": 2, "wörld": 3, "!": 5}
+    strategy = strategy_class(vocab)
+    batch = np.asarray([[1, 2, 3, 5], [3, 4, 99, 1]])
+
+    assert strategy.decode_array(batch) == [
+        strategy.decode(row) for row in batch.tolist()
+    ]
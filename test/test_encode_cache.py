@@ -0,0 +1,116 @@
+import os
+import subprocess
+import sys
+
+from src.encode_cache import EncodeCache, content_key
+from src.tokenization_strategy import BPETokenizationStrategy
+from src.tokenizer import Tokenizer
+
+
+class _CountingStrategy(BPETokenizationStrategy):
+    def __init__(self):
+        super().__init__()
+        self.encoded = 0
+
+    def encode(self, text):
+        self.encoded += 1
+        return super().encode(text)
+
+
+def test_repeat_encode_skips_tokenization(tmp_path, verdict_text):
+    text = verdict_text
+    strategy = _CountingStrategy()
+    strategy.train(text, vocab_size=400)
+    tokenizer = Tokenizer(strategy=strategy, encode_cache=EncodeCache(tmp_path))
+
+    first = tokenizer.encode(text)
+    second = Tokenizer(strategy=strategy, encode_cache=EncodeCache(tmp_path)).encode(text)
+
+    assert second == first
+    assert strategy.encoded == 1
+
+
+def test_key_depends_on_tokenizer_fingerprint(verdict_text):
+    text = verdict_text
+    small = BPETokenizationStrategy()
+    small.train(text, vocab_size=300)
+    large = BPETokenizationStrategy()
+    large.train(text, vocab_size=400)
+
+    assert small.fingerprint() != large.fingerprint()
+    assert content_key(text, small.fingerprint()) != content_key(text, large.fingerprint())
+
+
+def test_fingerprint_does_not_depend_on_hash_seed():
+    # Special-token ids used to follow set iteration order, which changes
+    # with PYTHONHASHSEED, so a retrained tokenizer missed the cache.
+    script = (
+        "import sys; sys.path.insert(0, 'src')\n"
+        "from tokenization_strategy import BPETokenizationStrategy\n"
+        "strategy = BPETokenizationStrategy()\n"
+        "strategy.train(open('assets/the-verdict.txt', encoding='utf-8').read(), 300)\n"
+        "print(strategy.fingerprint())\n"
+    )
+    fingerprints = {
+        subprocess.run(
+            [sys.executable, "-c", script],
+            env={**os.environ, "PYTHONHASHSEED": seed},
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        for seed in ("1", "2", "3")
+    }
+    assert len(fingerprints) == 1
+
+
+def test_only_new_documents_are_encoded(tmp_path, verdict_text):
+    strategy = _CountingStrategy()
+    strategy.train(verdict_text, vocab_size=300)
+    cache = EncodeCache(tmp_path, min_chars=0)
+    documents = ["the first document", "the second one"]
+
+    expected = cache.encode_documents(strategy, documents)
+    strategy.encoded = 0
+    ids = cache.encode_documents(strategy, documents + ["a third document"])
+
+    assert ids[:2] == expected
+    assert strategy.encoded == 1
+    assert cache.stats()["entries"] == 3
+
+
+def test_cached_encode_batch_reads_input_lazily(tmp_path, verdict_text):
+    strategy = BPETokenizationStrategy()
+    strategy.train(verdict_text, vocab_size=300)
+    tokenizer = Tokenizer(strategy=strategy, encode_cache=EncodeCache(tmp_path, min_chars=0))
+    documents = [f"document number {i}" for i in range(20)]
+    pulled = []
+
+    def source():
+        for document in documents:
+            pulled.append(document)
+            yield document
+
+    first_chunk = []
+    original = strategy.encode_batch
+    strategy.encode_batch = lambda texts: first_chunk.append(len(pulled)) or original(texts)
+    encoded = tokenizer.encode_batch(source(), chunk_size=4)
+
+    assert first_chunk[0] <= 4
+    assert encoded == [strategy.encode(document) for document in documents]
+
+
+def test_size_limit_evicts_least_recently_used(tmp_path):
+    cache = EncodeCache(tmp_path, max_bytes=100)
+    cache.put("aa" + "0" * 62, list(range(10)))
+    cache.put("bb" + "0" * 62, list(range(10)))
+    for entry in cache.entries():
+        os.utime(entry.path, (0, 0))
+    cache.get("bb" + "0" * 62)
+    cache.put("cc" + "0" * 62, list(range(10)))
+
+    keys = {entry.key[:2] for entry in cache.entries()}
+    assert keys == {"bb", "cc"}
+    assert cache.stats()["bytes"] <= 100
+    assert list(cache.get("cc" + "0" * 62)) == list(range(10))
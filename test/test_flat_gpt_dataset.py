@@ -0,0 +1,34 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from src.gpt_dataset import FlatGPTDataset, GPTDataset, RandomWindowSampler  # noqa: E402
+
+
+@pytest.mark.parametrize("max_length,stride", [(4, 1), (4, 4), (3, 2)])
+def test_flat_windows_match_gpt_dataset(max_length, stride, id_tokenizer):
+    text = " ".join(str(i * 7 % 70000) for i in range(50))
+    eager = GPTDataset(tokenizer=id_tokenizer)
+    flat = FlatGPTDataset(tokenizer=id_tokenizer)
+    for dataset in (eager, flat):
+        dataset.create_chunks(text, max_length=max_length, stride=stride)
+        dataset.create_chunks("1 2 3 4 5 6 7", max_length=max_length, stride=stride)
+
+    assert len(flat) == len(eager)
+    for index in range(len(eager)):
+        flat_input, flat_target = flat[index]
+        eager_input, eager_target = eager[index]
+        assert flat_input.tolist() == eager_input.tolist()
+        assert flat_target.tolist() == eager_target.tolist()
+
+
+def test_random_window_sampler_stays_in_range(id_tokenizer):
+    dataset = FlatGPTDataset(tokenizer=id_tokenizer)
+    dataset.create_chunks(" ".join(str(i) for i in range(100)), max_length=4, stride=1)
+    sampler = RandomWindowSampler(
+        dataset, num_samples=1000, generator=torch.Generator().manual_seed(0)
+    )
+
+    offsets = list(sampler)
+    assert len(offsets) == 1000
+    assert all(0 <= offset < len(dataset) for offset in offsets)
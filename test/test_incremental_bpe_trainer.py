@@ -0,0 +1,30 @@
+import random
+
+from src.bpe_trainer import IncrementalBPETrainer
+from src.tokenization_strategy import BPETokenizationStrategy
+
+
+def _train(text, vocab_size, engine):
+    strategy = BPETokenizationStrategy()
+    strategy.train(text, vocab_size=vocab_size, engine=engine)
+    return list(strategy._bpe_merges.items())
+
+
+def test_overlapping_pair_is_merged_left_to_right():
+    merges = IncrementalBPETrainer([1, 1, 1, 1, 2]).train(3, 6)
+    assert merges == {(1, 1): 3, (3, 3): 4, (4, 2): 5}
+
+
+def test_incremental_matches_naive_on_verdict(verdict_text):
+    text = verdict_text
+    assert _train(text, 500, "incremental") == _train(text, 500, "naive")
+
+
+def test_incremental_matches_naive_on_random_text():
+    rng = random.Random(0)
+    for _ in range(100):
+        text = "".join(rng.choice("aab c") for _ in range(rng.randint(1, 50)))
+        vocab_size = rng.randint(262, 290)
+        assert _train(text, vocab_size, "incremental") == _train(
+            text, vocab_size, "naive"
+        )
@@ -0,0 +1,36 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from src.create_dataloader import CreateDataLoader  # noqa: E402
+from src.loader_telemetry import InstrumentedDataLoader, percentile  # noqa: E402
+
+
+def test_percentile_picks_nearest_rank():
+    values = [float(i) for i in range(101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 50) == 0.0
+
+
+def test_instrumented_loader_counts_batches_and_tokens():
+    batches = [(torch.zeros(2, 4), torch.zeros(2, 4)) for _ in range(5)]
+    loader = InstrumentedDataLoader(batches)
+
+    assert list(loader) == batches
+    stats = loader.stats()
+    assert stats["batches"] == 5
+    assert stats["tokens"] == 40
+    assert 0.0 <= stats["wait_fraction"] <= 1.0
+
+
+def test_calibration_returns_a_tried_setting():
+    dataset = torch.utils.data.TensorDataset(torch.arange(64).view(32, 2))
+    create_data_loader = CreateDataLoader(dataset=dataset)
+
+    best = create_data_loader.calibrate(
+        worker_candidates=[0, 1], calibration_batches=4, batch_size=4
+    )
+
+    assert len(create_data_loader.calibration_results) == 3
+    assert best["num_workers"] in (0, 1)
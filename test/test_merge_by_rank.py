@@ -0,0 +1,68 @@
+import random
+
+from src.utils import merge_by_rank
+
+
+def _reference_merge(ids, ranks, merges):
+    # Repeatedly merge every occurrence of the lowest-ranked adjacent pair.
+    ids = list(ids)
+    while len(ids) > 1:
+        pairs = set(zip(ids, ids[1:]))
+        pair = min(pairs, key=lambda p: ranks.get(p, float("inf")))
+        if pair not in ranks:
+            break
+        merged = []
+        i = 0
+        while i < len(ids):
+            if i < len(ids) - 1 and (ids[i], ids[i + 1]) == pair:
+                merged.append(merges[pair])
+                i += 2
+            else:
+                merged.append(ids[i])
+                i += 1
+        ids = merged
+    return ids
+
+
+def test_merges_apply_in_rank_order():
+    merges = {(2, 3): 10, (1, 2): 11}
+    ranks = {(2, 3): 0, (1, 2): 1}
+    assert merge_by_rank([1, 2, 3], ranks, merges) == [1, 10]
+
+
+def test_overlapping_pair_merges_leftmost_first():
+    merges = {(1, 1): 5}
+    ranks = {(1, 1): 0}
+    assert merge_by_rank([1, 1, 1], ranks, merges) == [5, 1]
+
+
+def test_matches_reference_on_random_merges():
+    rng = random.Random(0)
+    for _ in range(200):
+        merges = {}
+        next_id = 4
+        for _ in range(rng.randint(1, 12)):
+            pair = (rng.randrange(next_id), rng.randrange(next_id))
+            if pair not in merges:
+                merges[pair] = next_id
+                next_id += 1
+        ranks = {pair: rank for rank, pair in enumerate(merges)}
+        ids = [rng.randrange(4) for _ in range(rng.randint(0, 30))]
+        assert merge_by_rank(ids, ranks, merges) == _reference_merge(
+            ids, ranks, merges
+        )
+
+
+def test_bpe_encode_matches_reference_on_verdict(verdict_text):
+    from src.tokenization_strategy import BPETokenizationStrategy
+
+    text = verdict_text
+    strategy = BPETokenizationStrategy()
+    strategy.train(text, vocab_size=600)
+
+    lookups = strategy._get_lookups()
+    for word in set(text.split()):
+        ids = strategy._get_token_ids(word)
+        assert strategy._tokenize_with_bpe(word) == _reference_merge(
+            ids, lookups.ranks, lookups.merges
+        )
@@ -0,0 +1,42 @@
+import random
+import re
+
+from src.pretokenizer import REGEX_TOKEN_PATTERN, PreTokenizer
+from src.tokenization_strategy import RegexTokenizationStrategy
+
+
+def _split_tokens(text):
+    preprocessed = re.split(r'([,.:;?_!"()\']|--|\s)', text)
+    return [item.strip() for item in preprocessed if item.strip()]
+
+
+def _tokens(pretokenizer, text):
+    return [(text[start:end], special) for start, end, special in pretokenizer.spans(text)]
+
+
+def test_regex_pattern_matches_re_split():
+    pretokenizer = PreTokenizer([], REGEX_TOKEN_PATTERN)
+    rng = random.Random(0)
+    for _ in range(2000):
+        text = "".join(rng.choice("ab-- ,.'\"!\t\n_") for _ in range(rng.randint(0, 20)))
+        assert [token for token, _ in _tokens(pretokenizer, text)] == _split_tokens(text)
+
+
+def test_special_tokens_are_found_without_surrounding_spaces():
+    pretokenizer = PreTokenizer(["<|endoftext|>", "<|end|>"])
+    text = "foo<|endoftext|>bar <|end|><|en"
+
+    assert _tokens(pretokenizer, text) == [
+        ("foo", False),
+        ("<|endoftext|>", True),
+        ("bar", False),
+        ("<|end|>", True),
+        ("<|en", False),
+    ]
+
+
+def test_regex_strategy_keeps_special_tokens_whole():
+    vocab = {"<|unk|>": 0, "<|endoftext|>": 1, "Hello": 2, ",": 3, "world": 4}
+    strategy = RegexTokenizationStrategy(vocab)
+
+    assert strategy.encode("Hello, world<|endoftext|>Hello") == [2, 3, 4, 1, 2]
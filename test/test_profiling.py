@@ -0,0 +1,49 @@
+import json
+
+from src.tokenization_strategy import BPETokenizationStrategy
+from src.tokenizer import Tokenizer
+
+# The src modules import each other by bare name, so this is the instance
+# they record into.
+from profiling import PROFILER
+
+
+def _tokenizer():
+    strategy = BPETokenizationStrategy(cache_max_entries=100)
+    strategy.train("the cat sat on the mat, the cat ate the rat. " * 20, vocab_size=300)
+    return Tokenizer(strategy=strategy)
+
+
+def test_disabled_profiler_records_nothing():
+    tokenizer = _tokenizer()
+    PROFILER.reset()
+    tokenizer.encode("the cat sat on the mat")
+
+    assert PROFILER.to_dict() == {"stages": {}, "counters": {}}
+
+
+def test_enabled_profiler_records_stages_counters_and_trace(tmp_path):
+    tokenizer = _tokenizer()
+    text = "the cat sat on the mat, the bat sat on the hat"
+    expected = tokenizer.encode(text)
+
+    PROFILER.reset()
+    PROFILER.enable(trace=True)
+    try:
+        assert tokenizer.encode(text) == expected
+    finally:
+        PROFILER.disable()
+
+    report = PROFILER.to_dict()
+    assert report["stages"]["tokenizer.encode"]["calls"] == 1
+    assert "bpe.pretokenize" in report["stages"]
+    assert report["counters"]["tokenizer.bytes_processed"] == len(text)
+    assert report["counters"]["bpe.words_seen"] == 12
+    assert report["counters"]["bpe.cache_hits"] + report["counters"]["bpe.cache_misses"] > 0
+    assert json.loads(PROFILER.to_json())["counters"] == report["counters"]
+
+    trace_path = tmp_path / "trace.json"
+    PROFILER.to_chrome_trace(str(trace_path))
+    events = json.loads(trace_path.read_text())["traceEvents"]
+    assert {event["name"] for event in events} >= {"tokenizer.encode", "bpe.pretokenize"}
+    PROFILER.reset()
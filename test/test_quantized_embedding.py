@@ -0,0 +1,39 @@
+import pickle
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("numpy")
+
+from src.quantized_embedding import (  # noqa: E402
+    QuantizedEmbedding,
+    export_quantized_embedding,
+    quantization_error,
+)
+
+
+def test_lookup_error_is_bounded_by_half_a_step(tmp_path):
+    weight = torch.randn(100, 16)
+    weight[7] = 0.0
+    export_quantized_embedding(weight, tmp_path / "table.bin")
+    embedding = QuantizedEmbedding(tmp_path / "table.bin")
+
+    ids = torch.tensor([[0, 7, 99], [5, 5, 42]])
+    step = weight.abs().max(dim=1).values / 127
+    error = (embedding(ids) - weight[ids]).abs()
+
+    assert embedding(ids).shape == (2, 3, 16)
+    assert (error <= step[ids].unsqueeze(-1) / 2 + 1e-6).all()
+    assert quantization_error(weight, embedding)["min_row_cosine"] > 0.999
+
+
+def test_pickled_module_remaps_the_file(tmp_path):
+    weight = torch.randn(10, 4)
+    export_quantized_embedding(weight, tmp_path / "table.bin")
+    embedding = QuantizedEmbedding(tmp_path / "table.bin")
+    ids = torch.tensor([1, 2, 3])
+    expected = embedding(ids)
+
+    restored = pickle.loads(pickle.dumps(embedding))
+
+    assert torch.equal(restored(ids), expected)
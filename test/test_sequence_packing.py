@@ -0,0 +1,62 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from src.sequence_packing import (  # noqa: E402
+    IGNORE_INDEX,
+    LengthBucketBatchSampler,
+    PackedGPTDataset,
+    pack_best_fit_decreasing,
+    split_documents,
+)
+
+
+def test_split_documents_keeps_end_of_text():
+    assert split_documents([5, 6, 0, 7, 0, 8, 9], eot_id=0) == [[5, 6, 0], [7, 0], [8, 9]]
+
+
+def test_best_fit_decreasing_respects_capacity():
+    lengths = [7, 5, 4, 3, 3, 2, 1]
+    bins = pack_best_fit_decreasing(lengths, capacity=8)
+
+    assert sorted(item for items in bins for item in items) == list(range(7))
+    assert all(sum(lengths[i] for i in items) <= 8 for items in bins)
+    assert len(bins) == 4
+
+
+def test_packed_rows_never_cross_documents(id_tokenizer):
+    text = "1 2 3 <|endoftext|> 4 5 <|endoftext|> 6 7 8 9 <|endoftext|>"
+    dataset = PackedGPTDataset(tokenizer=id_tokenizer)
+    dataset.create_chunks(text, max_length=6)
+
+    pairs = set()
+    for inputs, targets, positions, documents in dataset:
+        for x, y, position, document in zip(inputs, targets, positions, documents):
+            if document == 0:
+                assert y == IGNORE_INDEX
+                continue
+            pairs.add((x.item(), y.item()))
+    assert pairs == {(1, 2), (2, 3), (3, 0), (4, 5), (5, 0), (6, 7), (7, 8), (8, 9), (9, 0)}
+    assert dataset.token_efficiency() == 9 / (6 * len(dataset))
+
+
+def test_create_chunks_adds_to_existing_rows(id_tokenizer):
+    dataset = PackedGPTDataset(tokenizer=id_tokenizer)
+    dataset.create_chunks("1 2 3 4 5 6 7 <|endoftext|>", max_length=4)
+    first = len(dataset)
+    dataset.create_chunks("8 9 <|endoftext|>", max_length=4)
+
+    assert len(dataset) == first + 1
+    assert dataset[0][0].tolist() == [1, 2, 3, 4]
+    assert dataset[first][0].tolist()[:2] == [8, 9]
+    with pytest.raises(ValueError):
+        dataset.create_chunks("1 2 <|endoftext|>", max_length=8)
+
+
+def test_length_buckets_group_similar_lengths():
+    lengths = list(range(100))
+    sampler = LengthBucketBatchSampler(lengths, batch_size=10, bucket_size=100)
+    batches = list(sampler)
+
+    assert len(batches) == len(sampler) == 10
+    assert all(max(lengths[i] for i in b) - min(lengths[i] for i in b) == 9 for b in batches)
@@ -0,0 +1,24 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("torch")
+
+from src.shard_dataset import ShardDataset  # noqa: E402
+from src.shard_writer import ShardWriter  # noqa: E402
+
+
+def test_windows_cross_shard_boundaries(tmp_path):
+    tokens = np.arange(50, dtype=np.int64)
+    writer = ShardWriter(str(tmp_path), "uint16", shard_tokens=7)
+    writer.add(tokens[:20])
+    writer.add(tokens[20:])
+    writer.close()
+
+    dataset = ShardDataset(tmp_path, max_length=4, stride=3)
+
+    assert len(dataset) == len(range(0, 50 - 4, 3))
+    for index in range(len(dataset)):
+        inputs, targets = dataset[index]
+        start = index * 3
+        assert inputs.tolist() == list(range(start, start + 4))
+        assert targets.tolist() == list(range(start + 1, start + 5))
@@ -0,0 +1,59 @@
+import random
+
+from src.stream_decoder import Utf8StreamDecoder
+from src.tokenization_strategy import (
+    BPETokenizationStrategy,
+    RegexTokenizationStrategy,
+    WhitespaceTokenizationStrategy,
+)
+
+
+def _stream(strategy, ids, chunk_size=1):
+    decoder = strategy.stream_decoder()
+    pieces = [
+        decoder.step(ids[start : start + chunk_size])
+        for start in range(0, len(ids), chunk_size)
+    ]
+    return "".join(pieces) + decoder.flush()
+
+
+def test_bpe_stream_matches_decode(verdict_text):
+    text = verdict_text
+    strategy = BPETokenizationStrategy()
+    strategy.train(text, vocab_size=500)
+    ids = strategy.encode(text[:5000])
+
+    assert _stream(strategy, ids) == strategy.decode(ids)
+    assert _stream(strategy, ids, chunk_size=7) == strategy.decode(ids)
+
+
+def test_regex_stream_applies_punctuation_spacing():
+    vocab = {"<|unk|>": 0, "Hello": 1, ",": 2, "world": 3, "!": 4, '"': 5, " ": 6}
+    strategy = RegexTokenizationStrategy(vocab)
+    rng = random.Random(0)
+    for _ in range(200):
+        ids = [rng.randrange(8) for _ in range(rng.randrange(12))]
+        assert _stream(strategy, ids) == strategy.decode(ids)
+
+    decoder = strategy.stream_decoder()
+    assert decoder.step(1) == "Hello"
+    # The space is held until the next token shows it precedes punctuation.
+    assert decoder.step(3) == " world"
+    assert decoder.step([2, 4]) == ",!"
+
+
+def test_whitespace_stream_matches_decode():
+    strategy = WhitespaceTokenizationStrategy({"<|unk|>": 0, "a": 1, "b": 2})
+    ids = [1, 2, 9, 1]
+
+    assert _stream(strategy, ids) == strategy.decode(ids) == "a b <|unk|> a"
+
+
+def test_utf8_stream_holds_split_characters():
+    pieces = {0: "h".encode(), 1: "é".encode()[:1], 2: "é".encode()[1:]}
+    decoder = Utf8StreamDecoder(pieces.__getitem__)
+
+    assert decoder.step(0) == "h"
+    assert decoder.step(1) == ""
+    assert decoder.step(2) == "é"
+    assert decoder.step(1) + decoder.flush() == "�"
@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from src import streaming_dataset  # noqa: E402
+from src.create_dataloader import CreateDataLoader  # noqa: E402
+from src.gpt_dataset import GPTDataset  # noqa: E402
+from src.streaming_dataset import StreamingGPTDataset  # noqa: E402
+
+
+def test_single_worker_stream_matches_gpt_dataset(tmp_path, id_tokenizer):
+    text = " ".join(str(i) for i in range(500))
+    corpus = tmp_path / "corpus.txt"
+    corpus.write_text(text, encoding="utf-8")
+
+    eager = GPTDataset(tokenizer=id_tokenizer)
+    eager.create_chunks(text, max_length=8, stride=3)
+    stream = StreamingGPTDataset(
+        id_tokenizer, [corpus], max_length=8, stride=3, block_size=64
+    )
+
+    streamed = [(x.tolist(), y.tolist()) for x, y in stream]
+    assert streamed == [(x.tolist(), y.tolist()) for x, y in eager]
+
+
+def test_worker_windows_are_windows_of_the_single_worker_stream(tmp_path, id_tokenizer):
+    sources = []
+    for p in range(5):
+        corpus = tmp_path / f"part{p}.txt"
+        corpus.write_text(" ".join(str(p * 100 + i) for i in range(37)), encoding="utf-8")
+        sources.append(corpus)
+    stream = StreamingGPTDataset(
+        id_tokenizer, sources, max_length=8, stride=3, block_size=32
+    )
+
+    single = [tuple(x.tolist()) for x, _ in stream]
+    loader = torch.utils.data.DataLoader(stream, batch_size=None, num_workers=2)
+    sharded = [tuple(x.tolist()) for x, _ in loader]
+
+    assert len(sharded) == len(set(sharded))
+    assert sorted(sharded) == sorted(single)
+
+
+def test_fewer_sources_than_workers_warns(tmp_path, id_tokenizer, monkeypatch):
+    corpus = tmp_path / "corpus.txt"
+    corpus.write_text(" ".join(str(i) for i in range(50)), encoding="utf-8")
+    stream = StreamingGPTDataset(id_tokenizer, [corpus], max_length=8, stride=8)
+    monkeypatch.setattr(
+        streaming_dataset, "get_worker_info", lambda: SimpleNamespace(id=0, num_workers=3)
+    )
+
+    with pytest.warns(UserWarning, match="2 workers will produce no windows"):
+        windows = list(stream)
+    assert len(windows) == 6
+
+
+def test_create_data_loader_streams_with_default_options(tmp_path, id_tokenizer):
+    corpus = tmp_path / "corpus.txt"
+    corpus.write_text(" ".join(str(i) for i in range(100)), encoding="utf-8")
+    stream = StreamingGPTDataset(id_tokenizer, [corpus], max_length=4, stride=4)
+
+    batches = list(CreateDataLoader(stream).execute(batch_size=2))
+
+    assert len(batches) == 12
+    inputs, targets = batches[0]
+    assert inputs.tolist() == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert targets.tolist() == [[1, 2, 3, 4], [5, 6, 7, 8]]
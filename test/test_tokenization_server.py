@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from src.tokenization_server import TokenizationClient, TokenizationServer
+from src.tokenization_strategy import BPETokenizationStrategy
+
+
+@pytest.fixture
+def tokenizer_path(tmp_path, verdict_text):
+    text = verdict_text
+    strategy = BPETokenizationStrategy()
+    strategy.train(text, vocab_size=400)
+    strategy.save(tmp_path / "bpe.tok")
+    return str(tmp_path / "bpe.tok"), strategy, text.splitlines()
+
+
+@pytest.mark.parametrize("transport", ["tcp", "unix"])
+def test_concurrent_requests_are_batched_and_answered(tokenizer_path, tmp_path, transport):
+    path, strategy, documents = tokenizer_path
+
+    async def scenario():
+        server = TokenizationServer(path, max_batch=16, max_latency_ms=5, num_workers=0)
+        if transport == "unix":
+            socket_path = str(tmp_path / "tok.sock")
+            await server.start(unix_path=socket_path)
+            client = TokenizationClient(unix_path=socket_path, pool_size=2)
+        else:
+            await server.start()
+            client = TokenizationClient(port=server.address[1], pool_size=2)
+
+        async with client:
+            encoded = await asyncio.gather(*(client.encode(d) for d in documents))
+            decoded = await asyncio.gather(*(client.decode(ids) for ids in encoded))
+            results = await asyncio.gather(
+                client.decode([10**9]), client.decode(encoded[0]), return_exceptions=True
+            )
+            assert isinstance(results[0], RuntimeError)
+            assert results[1] == strategy.decode(encoded[0])
+        stats = server.stats()
+        await server.close()
+        return encoded, decoded, stats
+
+    encoded, decoded, stats = asyncio.run(scenario())
+
+    assert encoded == [strategy.encode(d) for d in documents]
+    assert decoded == [strategy.decode(ids) for ids in encoded]
+    assert stats["mean_batch_size"] > 1
+
+
+def test_process_pool_counts_only_batches_that_ran(tokenizer_path):
+    path, strategy, documents = tokenizer_path
+    documents = documents[:20]
+
+    async def scenario():
+        server = TokenizationServer(path, max_batch=64, max_latency_ms=50)
+        await server.start()
+        async with TokenizationClient(port=server.address[1]) as client:
+            encoded = await asyncio.gather(*(client.encode(d) for d in documents))
+            before = server.stats()
+            # One bad id fails its batch; the retries then run one by one.
+            results = await asyncio.gather(
+                client.decode([10**9]),
+                *(client.decode(ids) for ids in encoded[:3]),
+                return_exceptions=True,
+            )
+            after = server.stats()
+        await server.close()
+        return encoded, before, results, after
+
+    encoded, before, results, after = asyncio.run(scenario())
+
+    assert encoded == [strategy.encode(d) for d in documents]
+    assert before["requests"] == len(documents)
+    assert isinstance(results[0], RuntimeError)
+    assert results[1:] == [strategy.decode(ids) for ids in encoded[:3]]
+    assert after["requests"] - before["requests"] == 3
+    assert after["batches"] - before["batches"] <= 3
+
+
+def test_close_while_a_client_is_connected(tokenizer_path):
+    path, strategy, documents = tokenizer_path
+
+    async def scenario():
+        server = TokenizationServer(path, num_workers=0)
+        await server.start()
+        serving = asyncio.create_task(server.serve_forever())
+        client = await TokenizationClient(port=server.address[1], pool_size=2).connect()
+        ids = await client.encode(documents[0])
+
+        serving.cancel()
+        await asyncio.gather(serving, return_exceptions=True)
+        # The client is still connected; close() must not wait for it.
+        await asyncio.wait_for(server.close(), 5)
+        await client.close()
+        return ids
+
+    assert asyncio.run(scenario()) == strategy.encode(documents[0])
@@ -0,0 +1,29 @@
+from src.tokenization_strategy import (
+    BPETokenizationStrategy,
+    RegexTokenizationStrategy,
+)
+
+
+def test_bpe_round_trip(tmp_path, verdict_text):
+    text = verdict_text
+    strategy = BPETokenizationStrategy()
+    strategy.train(text, vocab_size=600)
+    strategy.save(tmp_path / "bpe.tok")
+
+    loaded = BPETokenizationStrategy.load(tmp_path / "bpe.tok")
+
+    assert loaded._vocab == strategy._vocab
+    assert loaded._get_lookups() == strategy._get_lookups()
+    assert loaded._bpe_merges == strategy._bpe_merges
+    assert loaded.encode(text) == strategy.encode(text)
+
+
+def test_regex_round_trip(tmp_path):
+    vocab = {"<|unk|>": 0, "hello": 1, ",": 2, "wörld": 3}
+    strategy = RegexTokenizationStrategy(vocab)
+    strategy.save(tmp_path / "regex.tok")
+
+    loaded = RegexTokenizationStrategy.load(tmp_path / "regex.tok")
+
+    assert loaded.encode("hello, wörld!") == strategy.encode("hello, wörld!")
+    assert loaded.decode([1, 2, 3]) == "hello, wörld"
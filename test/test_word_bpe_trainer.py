@@ -0,0 +1,59 @@
+from collections import Counter
+
+import pytest
+
+from src.bpe_trainer import WordBPETrainer, count_words_parallel, read_file_chunks
+from src.utils import update_pair
+
+
+def _reference_merges(word_counts, first_id, vocab_size):
+    words = {tuple(word): count for word, count in word_counts.items()}
+    merges = {}
+    for new_id in range(first_id, vocab_size):
+        pairs = Counter()
+        for word, count in words.items():
+            for pair in zip(word, word[1:]):
+                pairs[pair] += count
+        if not pairs:
+            break
+        pair = min(pairs, key=lambda p: (-pairs[p], p))
+        words = {
+            tuple(update_pair(list(word), pair, new_id)): count
+            for word, count in words.items()
+        }
+        merges[pair] = new_id
+    return merges
+
+
+def test_word_trainer_matches_reference():
+    word_counts = {(1, 2, 3): 5, (2, 3, 2, 3): 2, (1, 1, 1): 4, (3, 1): 1}
+    expected = _reference_merges(word_counts, 10, 20)
+    assert WordBPETrainer(word_counts).train(10, 20) == expected
+
+
+def test_chunked_file_counts_match_whole_text(tmp_path, verdict_text):
+    text = verdict_text
+    corpus = tmp_path / "corpus.txt"
+    corpus.write_text(text, encoding="utf-8")
+
+    counts = count_words_parallel(files=[corpus], num_workers=0, chunk_size=97)
+    assert counts == Counter(text.split())
+
+
+def test_chunks_without_spaces_stay_bounded(tmp_path):
+    text = "\t".join(["word"] * 50) + "x" * 300
+    corpus = tmp_path / "corpus.tsv"
+    corpus.write_text(text, encoding="utf-8")
+
+    chunks = list(read_file_chunks([corpus], chunk_size=64))
+
+    assert "".join(chunks) == text
+    assert max(len(chunk) for chunk in chunks) < 2 * 64
+    assert count_words_parallel(files=[str(corpus)], num_workers=0, chunk_size=64)[
+        "word"
+    ] == 49
+
+
+def test_path_in_texts_is_rejected(tmp_path):
+    with pytest.raises(TypeError):
+        count_words_parallel(texts=[tmp_path / "corpus.txt"], num_workers=0)
@@ -0,0 +1,76 @@
+import sys
+import threading
+
+from src.tokenization_strategy import BPETokenizationStrategy
+from src.word_cache import WordCache
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = WordCache(max_entries=2)
+    cache.put("a", (1,))
+    cache.put("b", (2,))
+    cache.get("a")
+    cache.put("c", (3,))
+
+    assert cache.get("b") is None
+    assert cache.get("a") == (1,)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_limit_bounds_the_cache():
+    cache = WordCache(max_bytes=400)
+    for i in range(100):
+        cache.put(f"word{i}", (i, i + 1))
+
+    assert cache.stats()["bytes"] <= 400
+    assert 0 < len(cache) < 100
+
+
+def test_cached_encode_matches_uncached_and_resets_on_retrain(verdict_text):
+    text = verdict_text
+    cached = BPETokenizationStrategy(cache_max_entries=100)
+    plain = BPETokenizationStrategy()
+    cached.train(text, vocab_size=500)
+    plain.train(text, vocab_size=500)
+
+    assert cached.encode(text) == plain.encode(text)
+    assert cached.encode(text) == plain.encode(text)
+    assert cached.cache_stats()["hits"] > 0
+
+    cached.train(text, vocab_size=400)
+    plain.train(text, vocab_size=400)
+    assert cached.cache_stats()["entries"] == 0
+    assert cached.encode(text) == plain.encode(text)
+
+
+def test_concurrent_lookups_and_evictions():
+    cache = WordCache(max_entries=4)
+    errors = []
+
+    def work(step):
+        try:
+            for i in range(50000):
+                word = str(i * step % 6)
+                if cache.get(word) is None:
+                    cache.put(word, (i,))
+        except Exception as e:
+            errors.append(e)
+
+    # Switch threads as often as possible so lookups race with evictions.
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=work, args=(step,)) for step in (1, 3, 5, 7)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert errors == []
+    assert len(cache) == 4
+    assert cache.stats()["evictions"] > 0
+    assert cache.stats()["bytes"] == sum(
+        WordCache._entry_size(word, ids) for word, ids in cache._entries.items()
+    )